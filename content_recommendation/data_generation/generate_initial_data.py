@@ -11,6 +11,7 @@ Steps:
 6. If --generate-ai-content flag is set, call the AI content generation script.
 """
 import os
+import logging
 import sys
 import yaml
 import json
@@ -227,4 +228,5 @@ def run_initial_metadata_load(generate_ai: bool):
 
 # --- Script Entry Point ---
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     run_initial_metadata_load(generate_ai=args.generate_ai_content)
@@ -7,6 +7,7 @@ dynamically from table data at runtime. Extracts generated text using
 JSON_EXTRACT_SCALAR.
 """
 import os
+import logging
 import sys
 import yaml
 from dotenv import load_dotenv
@@ -279,6 +280,7 @@ def run_ai_content_generation(client: bigquery.Client, config: Dict[str, Any]):
 
 # --- Main Execution (for direct script running) ---
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     print("--- Starting AI Content Generation Script (Direct Execution) ---")
 
     dotenv_path_main = os.path.join(os.path.dirname(SCRIPT_DIR), '.env')
@@ -5,6 +5,7 @@ Fetches user details and recommendations from BigQuery using vector search.
 """
 import flet as ft
 import os
+import logging
 import sys
 import yaml
 from dotenv import load_dotenv
@@ -479,6 +480,7 @@ def main(page: ft.Page):
 
 # --- Run the App ---
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     print("Initializing application...")
     project_id, APP_CONFIG = load_configuration()
     if not project_id or not APP_CONFIG:
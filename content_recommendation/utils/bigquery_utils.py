@@ -5,10 +5,15 @@ Provides helper functions for connecting to BigQuery, managing datasets and tabl
 executing queries, fetching results, and loading data from NDJSON files.
 """
 import os
+import hashlib
+import logging
+import uuid
 from typing import List, Dict, Any, Optional, Iterator
 from google.cloud import bigquery
 from google.cloud.exceptions import NotFound
-from google.api_core.exceptions import GoogleAPICallError, Forbidden
+from google.api_core.exceptions import GoogleAPICallError, Forbidden, Conflict
+
+log = logging.getLogger(__name__)
 
 # ==============================================================================
 # Client and Query Execution Helpers
@@ -27,20 +32,20 @@ def get_bigquery_client(project_id: str) -> Optional[bigquery.Client]:
                                    is successful, otherwise None.
     """
     if not project_id:
-        print("ERROR: GCP Project ID is required to initialize BigQuery client.")
+        log.error("GCP Project ID is required to initialize BigQuery client.")
         return None
     try:
         client = bigquery.Client(project=project_id)
-        print("Testing BigQuery connection...")
+        log.info("Testing BigQuery connection...")
         client.query("SELECT 1").result() # Test query
-        print(f"BigQuery client authenticated successfully for project: {project_id}")
+        log.info("BigQuery client authenticated successfully for project: %s", project_id)
         return client
     except Forbidden as e:
-         print(f"ERROR: BigQuery client authentication failed (Forbidden): {e}. "
-               "Check permissions (e.g., BigQuery User/JobUser roles).")
+         log.error("BigQuery client authentication failed (Forbidden): %s. "
+                   "Check permissions (e.g., BigQuery User/JobUser roles).", e)
          return None
     except Exception as e: # Catch other potential exceptions
-        print(f"ERROR: BigQuery client authentication/connection failed: {e}")
+        log.error("BigQuery client authentication/connection failed: %s", e)
         return None
 
 
@@ -70,37 +75,37 @@ def execute_bq_query(
                                                 job failed.
     """
     if not client:
-        print("ERROR: execute_bq_query called with an invalid BigQuery client.")
+        log.error("execute_bq_query called with an invalid BigQuery client.")
         return None
 
-    print(f"{description}...")
+    log.info("%s...", description)
     job = None
     try:
         query_job = client.query(query, job_config=job_config)
         job = query_job
-        print(f"  Job ID: {query_job.job_id}")
+        log.debug("  Job ID: %s", query_job.job_id)
         results_iterator = query_job.result() # Waits for completion
 
         if query_job.errors:
-            print(f"ERROR: BigQuery job {query_job.job_id} failed:")
+            log.error("BigQuery job %s failed:", query_job.job_id)
             for error in query_job.errors:
-                print(f"  Reason: {error.get('reason', 'N/A')}, "
-                      f"Message: {error.get('message', 'N/A')}")
-            # print(f"Failed Query:\n---\n{query}\n---") # Uncomment for debugging
+                log.error("  Reason: %s, Message: %s",
+                          error.get('reason', 'N/A'), error.get('message', 'N/A'))
+            # log.debug("Failed Query:\n---\n%s\n---", query) # Uncomment for debugging
             return None
 
-        print(f"  Job {query_job.job_id} completed successfully.")
+        log.info("  Job %s completed successfully.", query_job.job_id)
         return results_iterator
 
     except GoogleAPICallError as e:
         job_id_str = f"Job ID: {job.job_id}" if job else "Job ID: N/A"
-        print(f"ERROR: API call error during BigQuery query execution ({job_id_str}): {e}")
-        # print(f"Failed Query:\n---\n{query}\n---") # Uncomment for debugging
+        log.error("API call error during BigQuery query execution (%s): %s", job_id_str, e)
+        # log.debug("Failed Query:\n---\n%s\n---", query) # Uncomment for debugging
         return None
     except Exception as e:
         job_id_str = f"Job ID: {job.job_id}" if job else "Job ID: N/A"
-        print(f"ERROR: Unexpected exception during BigQuery query execution ({job_id_str}): {e}")
-        # print(f"Failed Query:\n---\n{query}\n---") # Uncomment for debugging
+        log.error("Unexpected exception during BigQuery query execution (%s): %s", job_id_str, e)
+        # log.debug("Failed Query:\n---\n%s\n---", query) # Uncomment for debugging
         return None
 
 
@@ -122,42 +127,42 @@ def fetch_bq_results(
                                         or None if an error occurs or the client is invalid.
     """
     if not client:
-        print("ERROR: fetch_bq_results called with an invalid BigQuery client.")
+        log.error("fetch_bq_results called with an invalid BigQuery client.")
         return None
 
-    print(f"Executing BQ query to fetch results...")
+    log.info("Executing BQ query to fetch results...")
     job = None
     try:
         query_job = client.query(query, job_config=job_config)
         job = query_job
-        print(f"  Job ID: {query_job.job_id}")
+        log.debug("  Job ID: %s", query_job.job_id)
         results_iterator = query_job.result() # Waits for completion
 
         if query_job.errors:
-            print(f"ERROR: BigQuery job {query_job.job_id} failed:")
+            log.error("BigQuery job %s failed:", query_job.job_id)
             for error in query_job.errors:
-                print(f"  Reason: {error.get('reason', 'N/A')}, "
-                      f"Message: {error.get('message', 'N/A')}")
-            # print(f"Failed Query:\n---\n{query}\n---") # Uncomment for debugging
+                log.error("  Reason: %s, Message: %s",
+                          error.get('reason', 'N/A'), error.get('message', 'N/A'))
+            # log.debug("Failed Query:\n---\n%s\n---", query) # Uncomment for debugging
             return None
 
         records = [dict(row.items()) for row in results_iterator]
-        print(f"  Fetched {len(records)} records.")
+        log.info("  Fetched %d records.", len(records))
         return records
 
     except NotFound as e:
-         print(f"ERROR: Query execution failed - Resource not found: {e}")
-         # print(f"Failed Query:\n---\n{query}\n---") # Uncomment for debugging
+         log.error("Query execution failed - Resource not found: %s", e)
+         # log.debug("Failed Query:\n---\n%s\n---", query) # Uncomment for debugging
          return None
     except GoogleAPICallError as e:
         job_id_str = f"Job ID: {job.job_id}" if job else "Job ID: N/A"
-        print(f"ERROR: API call error during BigQuery query execution ({job_id_str}): {e}")
-        # print(f"Failed Query:\n---\n{query}\n---") # Uncomment for debugging
+        log.error("API call error during BigQuery query execution (%s): %s", job_id_str, e)
+        # log.debug("Failed Query:\n---\n%s\n---", query) # Uncomment for debugging
         return None
     except Exception as e:
         job_id_str = f"Job ID: {job.job_id}" if job else "Job ID: N/A"
-        print(f"ERROR: Unexpected exception during BigQuery query execution ({job_id_str}): {e}")
-        # print(f"Failed Query:\n---\n{query}\n---") # Uncomment for debugging
+        log.error("Unexpected exception during BigQuery query execution (%s): %s", job_id_str, e)
+        # log.debug("Failed Query:\n---\n%s\n---", query) # Uncomment for debugging
         return None
 
 # ==============================================================================
@@ -181,22 +186,23 @@ def create_dataset(
         bool: True if the dataset exists or is created successfully, False otherwise.
     """
     if not client:
-        print("ERROR: create_dataset called with invalid BigQuery client.")
+        log.error("create_dataset called with invalid BigQuery client.")
         return False
     try:
-        print(f"Ensuring dataset {dataset_ref} exists...")
+        log.info("Ensuring dataset %s exists...", dataset_ref)
         dataset_obj = bigquery.Dataset(dataset_ref)
         if location:
             dataset_obj.location = location
         # exists_ok=True makes this call idempotent
         created_dataset = client.create_dataset(dataset_obj, exists_ok=True, timeout=30)
-        print(f"Dataset {created_dataset.dataset_id} exists/created in {created_dataset.location}.")
+        log.info("Dataset %s exists/created in %s.",
+                 created_dataset.dataset_id, created_dataset.location)
         return True
     except GoogleAPICallError as e:
-        print(f"ERROR: API call error ensuring dataset {dataset_ref} exists: {e}")
+        log.error("API call error ensuring dataset %s exists: %s", dataset_ref, e)
         return False
     except Exception as e: # Catch other potential issues
-        print(f"ERROR: Failed to ensure dataset {dataset_ref} exists: {e}")
+        log.error("Failed to ensure dataset %s exists: %s", dataset_ref, e)
         return False
 
 def check_table_exists(
@@ -218,7 +224,7 @@ def check_table_exists(
     except NotFound:
         return False
     except Exception as e:
-        print(f"WARN: Error checking if table {table_ref} exists: {e}")
+        log.warning("Error checking if table %s exists: %s", table_ref, e)
         return False # Treat other errors as table not accessible/existing
 
 def delete_table(client: bigquery.Client, table_ref: bigquery.TableReference) -> bool:
@@ -232,17 +238,17 @@ def delete_table(client: bigquery.Client, table_ref: bigquery.TableReference) ->
         bool: True if the table doesn't exist or is deleted successfully, False otherwise.
     """
     if not client: return False
-    print(f"Attempting to delete table {table_ref} if it exists...")
+    log.info("Attempting to delete table %s if it exists...", table_ref)
     try:
         # not_found_ok=True makes this idempotent if table is already gone
         client.delete_table(table_ref, not_found_ok=True)
-        print(f"Table {table_ref} deleted (or did not exist).")
+        log.info("Table %s deleted (or did not exist).", table_ref)
         return True
     except GoogleAPICallError as e:
-        print(f"ERROR: API call error deleting table {table_ref}: {e}")
+        log.error("API call error deleting table %s: %s", table_ref, e)
         return False
     except Exception as e:
-        print(f"ERROR: Failed to delete table {table_ref}: {e}")
+        log.error("Failed to delete table %s: %s", table_ref, e)
         return False
 
 def truncate_table(
@@ -270,19 +276,59 @@ def truncate_table(
             description=f"Truncating table {table_id}"
         )
         if results_iterator is not None:
-            print(f"Table {table_ref_str} truncated.")
+            log.info("Table %s truncated.", table_ref_str)
             return True
         else:
-            print(f"ERROR: Failed to truncate table {table_ref_str}.")
+            log.error("Failed to truncate table %s.", table_ref_str)
             return False
     else:
-        print(f"INFO: Table {table_id} does not exist, skipping truncation.")
+        log.info("Table %s does not exist, skipping truncation.", table_id)
         return True # Considered success as the table is effectively empty
 
 # ==============================================================================
 # Data Loading
 # ==============================================================================
 
+def _deterministic_load_job_id(local_file_path: str, table_ref: bigquery.TableReference) -> str:
+    """Builds a content-addressed load job ID for a local file and destination.
+
+    Hashes the full destination table (project, dataset and table) and the
+    first 1 MB of the file together with its size and modification time, so
+    retrying the same file into the same table yields the same job ID and
+    BigQuery rejects the duplicate instead of loading the data twice.
+
+    Args:
+        local_file_path (str): Path to the local file being loaded.
+        table_ref (bigquery.TableReference): Destination table; its table ID is
+            also used as a readable prefix.
+
+    Returns:
+        str: A job ID of the form `load_auto_<table_id>_<digest>_<mtime>`.
+    """
+    stat = os.stat(local_file_path)
+    hasher = hashlib.blake2b(digest_size=8)
+    hasher.update(f"{table_ref.project}.{table_ref.dataset_id}.{table_ref.table_id}\n".encode())
+    with open(local_file_path, "rb") as f:
+        hasher.update(f.read(1_000_000))
+    hasher.update(str(stat.st_size).encode())
+    return f"load_auto_{table_ref.table_id}_{hasher.hexdigest()}_{int(stat.st_mtime)}"
+
+def _start_load_job(
+    client: bigquery.Client,
+    local_file_path: str,
+    table_ref: bigquery.TableReference,
+    job_config: bigquery.LoadJobConfig,
+    job_id: str,
+) -> bigquery.LoadJob:
+    """Submits a load job for a local file under the given job ID."""
+    with open(local_file_path, "rb") as source_file:
+        return client.load_table_from_file(
+            file_obj=source_file,
+            destination=table_ref,
+            job_config=job_config,
+            job_id=job_id,
+        )
+
 def load_ndjson_from_file(
     client: bigquery.Client,
     local_file_path: str,
@@ -291,7 +337,10 @@ def load_ndjson_from_file(
     """Loads data from a local NDJSON file into a BigQuery table.
 
     Uses BigQuery's schema autodetection and creates the table if it doesn't exist.
-    Truncates the table before loading (WRITE_TRUNCATE).
+    Truncates the table before loading (WRITE_TRUNCATE). The load job ID is
+    derived from the destination and the file contents, so retrying an unchanged
+    file waits on the existing job instead of starting a duplicate load; if that
+    job failed, the load is resubmitted under a new job ID.
 
     Args:
         client (bigquery.Client): Authenticated BigQuery client.
@@ -302,10 +351,10 @@ def load_ndjson_from_file(
         bool: True if the load job completes successfully, False otherwise.
     """
     if not client:
-        print("ERROR: load_ndjson_from_file requires a valid BigQuery client.")
+        log.error("load_ndjson_from_file requires a valid BigQuery client.")
         return False
     if not os.path.exists(local_file_path):
-        print(f"ERROR: Local NDJSON file not found: {local_file_path}")
+        log.error("Local NDJSON file not found: %s", local_file_path)
         return False
 
     job_config = bigquery.LoadJobConfig(
@@ -316,46 +365,53 @@ def load_ndjson_from_file(
     )
 
     table_name_str = f"{table_ref.dataset_id}.{table_ref.table_id}"
-    print(f"Loading data from '{os.path.basename(local_file_path)}' into {table_name_str} "
-          f"(auto-schema, create/truncate)...")
+    log.info("Loading data from '%s' into %s (auto-schema, create/truncate)...",
+             os.path.basename(local_file_path), table_name_str)
     load_job = None
     try:
-        with open(local_file_path, "rb") as source_file:
-            load_job = client.load_table_from_file(
-                file_obj=source_file,
-                destination=table_ref,
-                job_config=job_config,
-                job_id_prefix=f"load_auto_{table_ref.table_id}_" # Custom prefix for job ID
-            )
-        print(f"  Load job started: {load_job.job_id}")
+        job_id = _deterministic_load_job_id(local_file_path, table_ref)
+        try:
+            load_job = _start_load_job(client, local_file_path, table_ref, job_config, job_id)
+            log.debug("  Load job started: %s", load_job.job_id)
+        except Conflict:
+            # The same file was already submitted to this table; wait on that job instead.
+            load_job = client.get_job(job_id)
+            if load_job.state == 'DONE' and load_job.error_result:
+                # A failed job must not block retrying the same file
+                retry_job_id = f"{job_id}_retry_{uuid.uuid4().hex[:8]}"
+                log.info("  Load job %s previously failed, retrying as %s.", job_id, retry_job_id)
+                load_job = _start_load_job(client, local_file_path, table_ref, job_config, retry_job_id)
+            else:
+                log.info("  Load job %s already exists, reusing its result.", job_id)
         load_job.result(timeout=300) # Wait up to 5 minutes for completion
 
         if load_job.errors:
-            print(f"ERROR: Load job {load_job.job_id} for {table_name_str} failed:")
+            log.error("Load job %s for %s failed:", load_job.job_id, table_name_str)
             for error in load_job.errors:
-                 print(f"  Reason: {error.get('reason')}, Message: {error.get('message')}")
+                 log.error("  Reason: %s, Message: %s", error.get('reason'), error.get('message'))
             if any("schema" in str(e).lower() for e in load_job.errors):
-                print("  HINT: Schema auto-detection might have failed. "
-                      "Ensure NDJSON is well-formed and fields are consistent.")
+                log.error("  HINT: Schema auto-detection might have failed. "
+                          "Ensure NDJSON is well-formed and fields are consistent.")
             return False
         elif load_job.state == 'DONE':
             # Check output rows even on success
             rows_loaded = load_job.output_rows if load_job.output_rows is not None else 0
-            print(f"  Load job completed successfully. Loaded {rows_loaded} rows.")
+            log.info("  Load job completed successfully. Loaded %d rows.", rows_loaded)
             return True
         else:
-            print(f"WARN: Load job {load_job.job_id} finished with unexpected state: {load_job.state}")
+            log.warning("Load job %s finished with unexpected state: %s",
+                        load_job.job_id, load_job.state)
             return False
 
     except TimeoutError:
         job_id_str = f"Job ID: {load_job.job_id}" if load_job else "Job ID: N/A"
-        print(f"ERROR: Load job {job_id_str} for {table_name_str} timed out.")
+        log.error("Load job %s for %s timed out.", job_id_str, table_name_str)
         return False
     except GoogleAPICallError as e:
         job_id_str = f"Job ID: {load_job.job_id}" if load_job else "Job ID: N/A"
-        print(f"ERROR: API call error during file load for {table_name_str} ({job_id_str}): {e}")
+        log.error("API call error during file load for %s (%s): %s", table_name_str, job_id_str, e)
         return False
     except Exception as e:
         job_id_str = f"Job ID: {load_job.job_id}" if load_job else "Job ID: N/A"
-        print(f"ERROR: Unexpected exception during file load for {table_name_str} ({job_id_str}): {e}")
+        log.error("Unexpected exception during file load for %s (%s): %s", table_name_str, job_id_str, e)
         return False
\ No newline at end of file
@@ -6,6 +6,7 @@ Assumes AI-generated content (profile_summary, main_text) exists in source table
 Uses CREATE OR REPLACE TABLE to store embedding results.
 """
 import os
+import logging
 import sys
 import yaml
 import argparse
@@ -195,6 +196,7 @@ def generate_media_embeddings(client: bigquery.Client) -> bool:
 
 # --- Main Execution ---
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     print("--- Starting Embedding Generation Script ---")
 
     bq_client = get_bigquery_client(PROJECT_ID)
@@ -1,5 +1,6 @@
 # app.py
 import os
+import threading
 import streamlit as st
 from dotenv import load_dotenv
 from scam_analyzer import ScamAnalyzer
@@ -7,13 +8,20 @@ from scam_analyzer import ScamAnalyzer
 # Load environment variables at the beginning
 load_dotenv()
 
+@st.cache_resource
+def get_scam_analyzer() -> ScamAnalyzer:
+    """
+    Returns a ScamAnalyzer shared across reruns so its clients stay warm.
+    """
+    return ScamAnalyzer()
+
 # Streamlit UI - remains in the main script
 def main():
     """
     Main function to run the Streamlit application.
     """
 
-    scam_analyzer = ScamAnalyzer()
+    scam_analyzer = get_scam_analyzer()
 
     st.title("Scam Detection with Gemini")
     st.markdown(
@@ -39,8 +47,13 @@ def main():
         st.spinner("Checking for scams...")
         gcs_uri = None
         if uploaded_file:
+            # Warm up the Gemini connection while the file is uploading to GCS.
+            # The upload stays on the main thread so its st.error calls still render.
+            warmup_thread = threading.Thread(target=scam_analyzer.warmup, daemon=True)
+            warmup_thread.start()
             destination_blob_name = f"uploaded_files/{uploaded_file.name}"
             gcs_uri = scam_analyzer.upload_to_gcs(uploaded_file, destination_blob_name)
+            warmup_thread.join()
             if gcs_uri is None:
                 st.error("File upload failed. Please check your connection and try again.")
                 return
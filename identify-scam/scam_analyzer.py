@@ -36,42 +36,8 @@ class ScamAnalyzer:
         )
         self.storage_client = storage.Client()
 
-    def predict_gemini(self, text_input, 
-                       image_uri: Optional[str] = None,
-                       video_uri: Optional[str] = None) -> Optional[str]:
-        """
-        Sends a prompt to the Gemini model for prediction.
-        """
-        system_instruction = config["SYSTEM_INSTRUCTION"]
-        print(system_instruction)
-        system_instruction=types.Part.from_text(text=system_instruction)
-
-        text_prompt = config[self.primary_prompt].replace("__text_input__", text_input)
-        print(text_prompt)
-        prompt = types.Part.from_text(text=text_prompt)
-        
-        parts = [prompt]
-        if image_uri:
-            image_part = types.Part.from_uri(
-                file_uri=image_uri,
-                mime_type="image/jpeg"
-                )
-            parts.append(image_part)
-        # if video_uri:
-        #     video_part = types.Part.from_uri(
-        #         file_uri=video_uri,
-        #         mime_type="video/webm",
-        #     )
-        #     parts.append(video_part)
-
-        contents = [
-            types.Content(
-            role="user",
-            parts=parts
-            )
-        ]
-
-        generate_content_config = types.GenerateContentConfig(
+        # The generation config only depends on config.yaml, so build it once
+        self.generate_content_config = types.GenerateContentConfig(
             temperature = 1,
             top_p = 0.95,
             max_output_tokens = 8192,
@@ -115,15 +81,62 @@ class ScamAnalyzer:
                     "reasoning"
                 ]
                 },
-            system_instruction=[system_instruction]
+            system_instruction=[types.Part.from_text(text=config["SYSTEM_INSTRUCTION"])]
         )
+
+    def warmup(self) -> None:
+        """
+        Sends a minimal request to the Gemini model to establish the connection
+        ahead of the real prediction call.
+        """
+        try:
+            self.ai_client.models.generate_content(
+                model = self.model_name,
+                contents = ["ping"],
+                config = types.GenerateContentConfig(max_output_tokens = 1),
+            )
+        except Exception as e:
+            print(f"Gemini warmup failed (ignored): {e}")
+
+    def predict_gemini(self, text_input, 
+                       image_uri: Optional[str] = None,
+                       video_uri: Optional[str] = None) -> Optional[str]:
+        """
+        Sends a prompt to the Gemini model for prediction.
+        """
+        print(config["SYSTEM_INSTRUCTION"])
+
+        text_prompt = config[self.primary_prompt].replace("__text_input__", text_input)
+        print(text_prompt)
+        prompt = types.Part.from_text(text=text_prompt)
         
+        parts = [prompt]
+        if image_uri:
+            image_part = types.Part.from_uri(
+                file_uri=image_uri,
+                mime_type="image/jpeg"
+                )
+            parts.append(image_part)
+        # if video_uri:
+        #     video_part = types.Part.from_uri(
+        #         file_uri=video_uri,
+        #         mime_type="video/webm",
+        #     )
+        #     parts.append(video_part)
+
+        contents = [
+            types.Content(
+            role="user",
+            parts=parts
+            )
+        ]
+
         try:
             response = ""
             for chunk in self.ai_client.models.generate_content_stream(
                 model = self.model_name,
                 contents = contents,
-                config = generate_content_config,
+                config = self.generate_content_config,
                 ):
                 response += chunk.text
 
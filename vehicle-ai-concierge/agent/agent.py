@@ -1,8 +1,13 @@
-import os
-from dotenv import load_dotenv
+from typing import List
 
 from google.adk.agents import Agent
+from google.adk.agents.context_cache_config import ContextCacheConfig
 from google.adk.tools.agent_tool import AgentTool
+from google.genai import types
+from pydantic import BaseModel
+
+# Importing config loads .env and sets the GOOGLE_CLOUD_* variables ADK reads
+from config import settings
 
 # Import agent prompts and all tools
 from . import prompts
@@ -13,12 +18,26 @@ from tools import (
     lead_generation_tool,
 )
 
-# --- ADK Environment Configuration ---
-load_dotenv()
-os.environ["GOOGLE_CLOUD_PROJECT"] = os.getenv("VERTEX_AI_PROJECT_ID")
-os.environ["GOOGLE_CLOUD_LOCATION"] = os.getenv("VERTEX_AI_LOCATION")
-os.environ["GOOGLE_GENAI_USE_VERTEXAI"] = "True"
-MODEL_NAME = os.getenv("GEMINI_MODEL", "gemini-1.5-flash-latest")
+MODEL_NAME = settings.gemini_model
+
+# --- Context Caching ---
+# The agent instructions and tool declarations are static, so ADK caches them as
+# Vertex AI cached content and reuses it across turns. Requests below the Vertex
+# minimum (2048 tokens) are sent uncached; ADK refreshes the cache before expiry.
+CONTEXT_CACHE_CONFIG = ContextCacheConfig(
+    min_tokens=2048,
+    ttl_seconds=settings.context_cache_ttl_seconds,
+    cache_intervals=10,
+)
+
+
+def _static_instruction(prompt: str) -> types.Content:
+    """
+    Wraps a prompt in a Content object built once at import. ADK sends static
+    instructions verbatim as the system instruction, skipping the per-turn
+    placeholder templating that plain `instruction=` strings go through.
+    """
+    return types.Content(parts=[types.Part(text=prompt)])
 
 
 # --- 1. Define Specialist Agents ---
@@ -27,15 +46,17 @@ website_search_agent = Agent(
     name="WebsiteSearchAgent",
     model=MODEL_NAME,
     description="Use for general questions, vehicle information, support issues, or anything that might be on the Buick website.",
-    instruction=prompts.get_website_search_instructions(),
-    tools=[website_search_tool.search],
+    static_instruction=_static_instruction(prompts.WEBSITE_SEARCH_INSTRUCTIONS),
+    # Async, so concurrent conversations' searches are batched instead of each
+    # blocking a worker thread
+    tools=[website_search_tool.search_async],
 )
 
 dealership_search_agent = Agent(
     name="DealershipSearchAgent",
     model=MODEL_NAME,
     description="Use this tool to find nearby Buick dealerships by zip code.",
-    instruction=prompts.get_dealership_search_instructions(),
+    static_instruction=_static_instruction(prompts.DEALERSHIP_SEARCH_INSTRUCTIONS),
     tools=[dealership_search_tool.find_dealerships],
 )
 
@@ -43,7 +64,7 @@ parts_search_agent = Agent(
     name="PartsSearchAgent",
     model=MODEL_NAME,
     description="Use to search for vehicle parts and accessories for a specific model and year.",
-    instruction=prompts.get_parts_search_instructions(),
+    static_instruction=_static_instruction(prompts.PARTS_SEARCH_INSTRUCTIONS),
     tools=[parts_search_tool.search_parts],
 )
 
@@ -51,18 +72,52 @@ lead_generation_agent = Agent(
     name="LeadGenerationAgent",
     model=MODEL_NAME,
     description="Use when the user wants a price quote, to schedule a test drive, or provides contact info.",
-    instruction=prompts.get_lead_generation_instructions(),
+    static_instruction=_static_instruction(prompts.LEAD_GENERATION_INSTRUCTIONS),
     tools=[lead_generation_tool.format_lead_for_confirmation],
 )
 
 
-# --- 2. Define the Root Agent (The Orchestrator) ---
+# Specialists addressable by name, used by the parallel dispatch path in app.py
+specialist_agents = {
+    agent.name: agent
+    for agent in (
+        website_search_agent,
+        dealership_search_agent,
+        parts_search_agent,
+        lead_generation_agent,
+    )
+}
+
+
+# --- 2. Define the Query Planner (Parallel Dispatch) ---
+
+class PlannedCall(BaseModel):
+    agent: str
+    query: str
+
+
+class QueryPlan(BaseModel):
+    calls: List[PlannedCall]
+
+
+# The planner has no tools, so it can use Gemini's structured output mode: the
+# response is guaranteed to be JSON matching QueryPlan, with no markdown fences.
+planner_agent = Agent(
+    name="QueryPlannerAgent",
+    model=MODEL_NAME,
+    description="Splits a user query into independent sub-queries for the specialist agents.",
+    static_instruction=_static_instruction(prompts.PLANNER_INSTRUCTIONS),
+    output_schema=QueryPlan,
+)
+
+
+# --- 3. Define the Root Agent (The Orchestrator) ---
 
 root_agent = Agent(
     name="BuickConciergeOrchestrator",
     model=MODEL_NAME,
     description="The main conversational agent for all Buick customer needs.",
-    instruction=prompts.get_orchestrator_instructions(),
+    static_instruction=_static_instruction(prompts.ORCHESTRATOR_INSTRUCTIONS),
     tools=[
         AgentTool(agent=website_search_agent),
         AgentTool(agent=dealership_search_agent),
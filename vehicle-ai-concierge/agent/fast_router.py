@@ -0,0 +1,168 @@
+"""
+Keyword router for intent-obvious messages.
+
+Greetings get a static reply. Short dealership requests with a zip code and
+nothing else in them, and parts requests naming a model and year, are answered
+by calling the tool directly and formatting its output here, with no LLM call at
+all. Other clear parts requests go straight to the PartsSearchAgent, skipping the
+orchestrator's round-trip. Anything not matched here falls through to the
+orchestrator.
+"""
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Set
+
+from tools import dealership_search_tool, parts_search_tool
+
+GREETING_RESPONSE: Dict[str, Any] = {
+    "text": "Hello! I'm your Buick AI Concierge. I can help you explore Buick models, "
+            "find parts and accessories, locate a nearby dealership, or request a price quote. "
+            "What can I help you with today?",
+    "rich_content": [],
+}
+
+
+class Route(NamedTuple):
+    """A routing decision: either a specialist agent to call or a static response."""
+    agent_name: Optional[str] = None
+    response: Optional[Dict[str, Any]] = None
+
+
+_GREETING_RE = re.compile(
+    r"^\s*(hi|hello|hey|howdy|greetings|good\s+(morning|afternoon|evening))\b[\s!.,]*$",
+    re.IGNORECASE,
+)
+
+_ZIP_RE = re.compile(r"\b(\d{5})\b")
+_DEALER_RE = re.compile(r"\b(dealer|dealers|dealership|dealerships|store|stores|location|locations)\b",
+                        re.IGNORECASE)
+_PARTS_RE = re.compile(r"\b(parts|accessory|accessories)\b", re.IGNORECASE)
+# Anything a bare dealership listing wouldn't answer ("store hours", "and I want
+# a test drive") leaves the message to the orchestrator
+_NON_DEALER_INTENT_RE = re.compile(
+    r"\b(parts|accessory|accessories|test[\s-]+drive|quote|price|pricing|cost|buy|lease|"
+    r"finance|financing|hours|open|appointment|service|schedule|contact|call|street|st|ave|avenue|road|rd)\b",
+    re.IGNORECASE,
+)
+# "find a dealership near 02090"; longer messages usually carry more than one ask
+MAX_DEALER_QUERY_WORDS = 8
+_YEAR_RE = re.compile(r"\b(20\d{2})\b")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _model_aliases(models: Set[str]) -> Dict[str, str]:
+    """
+    Maps each way of naming a catalog model to the model. A model's full name
+    always counts; a shorter leading part of it ("Encore" for "Encore GX") only
+    counts while no other model starts with the same words.
+    """
+    claims: Dict[str, Set[str]] = {}
+    for model in models:
+        words = model.split()
+        for n in range(1, len(words) + 1):
+            claims.setdefault(" ".join(words[:n]), set()).add(model)
+    return {
+        alias: alias if alias in models else next(iter(owners))
+        for alias, owners in claims.items()
+        if alias in models or len(owners) == 1
+    }
+
+
+def _model_pattern(alias: str) -> "re.Pattern[str]":
+    words = r"\s+".join(re.escape(word) for word in alias.split())
+    return re.compile(rf"\b{words}\b", re.IGNORECASE)
+
+
+# (model, pattern) for every name of a model in the parts catalog, longest name
+# first so "Encore GX" is tried before a shorter name it contains
+_MODEL_PATTERNS = tuple(
+    (model, _model_pattern(alias))
+    for alias, model in sorted(
+        _model_aliases(
+            {comp["model"] for part in parts_search_tool.PARTS_DATABASE for comp in part.get("compatibility", [])}
+        ).items(),
+        key=lambda item: len(item[0]),
+        reverse=True,
+    )
+)
+
+# Words that carry no part-search meaning; whatever remains is used as the query
+_PARTS_FILLER_WORDS = frozenset("""
+    a an and any are available buick can do does find fit fits for get have i in is it
+    looking me my need of on or part parts accessory accessories please search see show
+    some that the there to want what which with you
+""".split())
+
+
+def _dealership_response(zip_code: str) -> Optional[Dict[str, Any]]:
+    """
+    Calls find_dealerships and formats its output as the frontend's JSON envelope.
+    Returns None when nothing is found, so the orchestrator can handle the request.
+    """
+    dealerships = dealership_search_tool.find_dealerships(zip_code)["dealerships"]
+    if not dealerships:
+        return None
+    closest = dealerships[0]
+    return {
+        "text": f"The closest Buick dealership to {zip_code} is {closest['name']}, "
+                f"about {closest['distance_miles']} miles away at {closest['address']}.",
+        "rich_content": dealerships,
+    }
+
+
+def _parts_response(message: str, model: str, year: int) -> Optional[Dict[str, Any]]:
+    """
+    Calls search_parts and formats its output as the frontend's JSON envelope.
+    Returns None when nothing matches, so the PartsSearchAgent can handle the request.
+    """
+    lower_message = _YEAR_RE.sub(" ", message.lower())
+    for word in model.lower().split():
+        lower_message = re.sub(rf"\b{re.escape(word)}\b", " ", lower_message)
+    query_words: List[str] = [w for w in _WORD_RE.findall(lower_message) if w not in _PARTS_FILLER_WORDS]
+
+    result = parts_search_tool.search_parts(query=" ".join(query_words) or None, model=model, year=year)
+    parts = result["results"]
+    if not parts:
+        return None
+    top_part = parts[0]
+    noun = "part" if len(parts) == 1 else "parts"
+    return {
+        "text": f"I found {len(parts)} {noun} for the {year} {model}, "
+                f"including the {top_part['name']} (${top_part['price']:.2f}).",
+        "rich_content": parts,
+    }
+
+
+def route(message: str) -> Optional[Route]:
+    """
+    Routes a message without an LLM call when its intent is obvious.
+
+    Args:
+        message: The user's message.
+
+    Returns:
+        A Route for greetings and clear specialist requests, or None to use the orchestrator.
+    """
+    if _GREETING_RE.match(message):
+        return Route(response=GREETING_RESPONSE)
+
+    zip_match = _ZIP_RE.search(message)
+    if (
+        zip_match
+        and _DEALER_RE.search(message)
+        and not _NON_DEALER_INTENT_RE.search(message)
+        and len(message.split()) <= MAX_DEALER_QUERY_WORDS
+    ):
+        response = _dealership_response(zip_match.group(1))
+        return Route(response=response) if response is not None else None
+
+    if _PARTS_RE.search(message):
+        year_match = _YEAR_RE.search(message)
+        if year_match:
+            for model, pattern in _MODEL_PATTERNS:
+                if pattern.search(message):
+                    response = _parts_response(message, model, int(year_match.group(1)))
+                    if response is not None:
+                        return Route(response=response)
+                    break
+        return Route(agent_name="PartsSearchAgent")
+    return None
@@ -0,0 +1,240 @@
+"""
+Redis-backed ADK session service.
+
+Stores each session in Redis so several worker processes can serve the same user
+and idle sessions expire instead of accumulating in memory. Enabled in
+agent/runtime.py when REDIS_URL is set.
+
+Writes are appends and per-key hash updates, never a rewrite of the whole
+session, so concurrent turns in one session (e.g. parallel specialist dispatch)
+don't overwrite each other's events or state. State follows ADK's prefixes:
+"app:" keys are shared by every user of the app, "user:" keys by all of a user's
+sessions, and "temp:" keys are never persisted.
+
+Key schema:
+    sess:{app_name}:{user_id}:{session_id}         -> hash {created_at, last_update_time}
+    sess_state:{app_name}:{user_id}:{session_id}   -> hash {state key: <JSON value>}
+    sess_events:{app_name}:{user_id}:{session_id}  -> list of <Event JSON>, oldest first
+    sess_index:{app_name}:{user_id}                -> set of session IDs for list_sessions()
+    user_state:{app_name}:{user_id}                -> hash {state key without "user:": <JSON value>}
+    app_state:{app_name}                           -> hash {state key without "app:": <JSON value>}
+"""
+import json
+import time
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+import redis.asyncio as redis
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+from google.adk.sessions.state import State
+
+DEFAULT_TTL_SECONDS = 3600
+
+# app-, user- and session-scoped parts of a state dict, app/user keys unprefixed
+_StateParts = Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]
+
+
+def _split_state(state: Dict[str, Any]) -> _StateParts:
+    """Splits state by scope, dropping temp: keys."""
+    app_state, user_state, session_state = {}, {}, {}
+    for key, value in state.items():
+        if key.startswith(State.APP_PREFIX):
+            app_state[key[len(State.APP_PREFIX):]] = value
+        elif key.startswith(State.USER_PREFIX):
+            user_state[key[len(State.USER_PREFIX):]] = value
+        elif not key.startswith(State.TEMP_PREFIX):
+            session_state[key] = value
+    return app_state, user_state, session_state
+
+
+def _encode(state: Dict[str, Any]) -> Dict[str, str]:
+    return {key: json.dumps(value) for key, value in state.items()}
+
+
+def _decode(raw_state: Dict[bytes, bytes], prefix: str = "") -> Dict[str, Any]:
+    return {prefix + key.decode(): json.loads(value) for key, value in raw_state.items()}
+
+
+class RedisSessionService(BaseSessionService):
+    """A session service that persists sessions in Redis with a sliding TTL."""
+
+    def __init__(self, redis_url: str, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        # A single client with its own connection pool is shared by all requests
+        self._redis = redis.Redis.from_url(redis_url)
+        self._ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def _session_key(app_name: str, user_id: str, session_id: str) -> str:
+        return f"sess:{app_name}:{user_id}:{session_id}"
+
+    @staticmethod
+    def _state_key(app_name: str, user_id: str, session_id: str) -> str:
+        return f"sess_state:{app_name}:{user_id}:{session_id}"
+
+    @staticmethod
+    def _events_key(app_name: str, user_id: str, session_id: str) -> str:
+        return f"sess_events:{app_name}:{user_id}:{session_id}"
+
+    @staticmethod
+    def _index_key(app_name: str, user_id: str) -> str:
+        return f"sess_index:{app_name}:{user_id}"
+
+    @staticmethod
+    def _user_state_key(app_name: str, user_id: str) -> str:
+        return f"user_state:{app_name}:{user_id}"
+
+    @staticmethod
+    def _app_state_key(app_name: str) -> str:
+        return f"app_state:{app_name}"
+
+    def _write_state(self, pipe, app_name: str, user_id: str, session_id: str, state: Dict[str, Any]) -> None:
+        """Queues per-key updates of each scope's state on a pipeline."""
+        app_state, user_state, session_state = _split_state(state)
+        if app_state:
+            pipe.hset(self._app_state_key(app_name), mapping=_encode(app_state))
+        if user_state:
+            pipe.hset(self._user_state_key(app_name, user_id), mapping=_encode(user_state))
+        if session_state:
+            pipe.hset(self._state_key(app_name, user_id, session_id), mapping=_encode(session_state))
+
+    def _refresh_ttl(self, pipe, app_name: str, user_id: str, session_id: str) -> None:
+        for key in (
+            self._session_key(app_name, user_id, session_id),
+            self._state_key(app_name, user_id, session_id),
+            self._events_key(app_name, user_id, session_id),
+            self._index_key(app_name, user_id),
+            self._user_state_key(app_name, user_id),
+        ):
+            pipe.expire(key, self._ttl_seconds)
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        session_id = session_id.strip() if session_id and session_id.strip() else str(uuid.uuid4())
+        now = time.time()
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.delete(
+                self._state_key(app_name, user_id, session_id),
+                self._events_key(app_name, user_id, session_id),
+            )
+            pipe.hset(
+                self._session_key(app_name, user_id, session_id),
+                mapping={"created_at": int(now), "last_update_time": now},
+            )
+            self._write_state(pipe, app_name, user_id, session_id, state or {})
+            pipe.sadd(self._index_key(app_name, user_id), session_id)
+            self._refresh_ttl(pipe, app_name, user_id, session_id)
+            await pipe.execute()
+        # Return the merged view, including existing app- and user-scoped state
+        return await self.get_session(app_name=app_name, user_id=user_id, session_id=session_id)
+
+    def _load_state(self, pipe, app_name: str, user_id: str, session_id: str) -> None:
+        pipe.hgetall(self._state_key(app_name, user_id, session_id))
+        pipe.hgetall(self._user_state_key(app_name, user_id))
+        pipe.hgetall(self._app_state_key(app_name))
+
+    @staticmethod
+    def _merge_state(raw_session: Dict, raw_user: Dict, raw_app: Dict) -> Dict[str, Any]:
+        state = _decode(raw_session)
+        state.update(_decode(raw_user, State.USER_PREFIX))
+        state.update(_decode(raw_app, State.APP_PREFIX))
+        return state
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        # Only the requested tail of the event list is transferred
+        start = -config.num_recent_events if config and config.num_recent_events else 0
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.hgetall(self._session_key(app_name, user_id, session_id))
+            self._load_state(pipe, app_name, user_id, session_id)
+            pipe.lrange(self._events_key(app_name, user_id, session_id), start, -1)
+            meta, raw_session, raw_user, raw_app, raw_events = await pipe.execute()
+        if not meta:
+            return None
+
+        events = [Event.model_validate_json(raw_event) for raw_event in raw_events]
+        if config and config.after_timestamp:
+            events = [e for e in events if e.timestamp >= config.after_timestamp]
+        return Session(
+            id=session_id,
+            app_name=app_name,
+            user_id=user_id,
+            state=self._merge_state(raw_session, raw_user, raw_app),
+            events=events,
+            last_update_time=float(meta[b"last_update_time"]),
+        )
+
+    async def list_sessions(self, *, app_name: str, user_id: str) -> ListSessionsResponse:
+        index_key = self._index_key(app_name, user_id)
+        session_ids = sorted(sid.decode() for sid in await self._redis.smembers(index_key))
+        if not session_ids:
+            return ListSessionsResponse(sessions=[])
+
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.hgetall(self._user_state_key(app_name, user_id))
+            pipe.hgetall(self._app_state_key(app_name))
+            for session_id in session_ids:
+                pipe.hgetall(self._session_key(app_name, user_id, session_id))
+                pipe.hgetall(self._state_key(app_name, user_id, session_id))
+            raw_user, raw_app, *rows = await pipe.execute()
+
+        sessions = []
+        for session_id, meta, raw_session in zip(session_ids, rows[::2], rows[1::2]):
+            if not meta:
+                # Expired since it was indexed
+                await self._redis.srem(index_key, session_id)
+                continue
+            # Match the other ADK services: listings omit events
+            sessions.append(Session(
+                id=session_id,
+                app_name=app_name,
+                user_id=user_id,
+                state=self._merge_state(raw_session, raw_user, raw_app),
+                last_update_time=float(meta[b"last_update_time"]),
+            ))
+        return ListSessionsResponse(sessions=sessions)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.delete(
+                self._session_key(app_name, user_id, session_id),
+                self._state_key(app_name, user_id, session_id),
+                self._events_key(app_name, user_id, session_id),
+            )
+            pipe.srem(self._index_key(app_name, user_id), session_id)
+            await pipe.execute()
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        # The base class drops temp: keys from the delta, applies it to the
+        # in-memory session, and appends the event there
+        event = await super().append_event(session=session, event=event)
+        if event.partial:
+            return event
+        session.last_update_time = event.timestamp
+
+        # Only this event and the keys it changed are written, atomically
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(self._events_key(session.app_name, session.user_id, session.id), event.model_dump_json())
+            if event.actions and event.actions.state_delta:
+                self._write_state(pipe, session.app_name, session.user_id, session.id, event.actions.state_delta)
+            pipe.hset(
+                self._session_key(session.app_name, session.user_id, session.id),
+                "last_update_time", event.timestamp,
+            )
+            pipe.sadd(self._index_key(session.app_name, session.user_id), session.id)
+            self._refresh_ttl(pipe, session.app_name, session.user_id, session.id)
+            await pipe.execute()
+        return event
@@ -0,0 +1,46 @@
+"""
+Process-wide ADK runtime: the session service and the runners built on it.
+
+Import these singletons instead of constructing new runners or session services,
+so every caller in the process shares one session store and one set of runners.
+
+Sessions are stored in Redis when REDIS_URL is set (required for running more
+than one worker process), otherwise in process memory.
+"""
+from google.adk.apps import App
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+
+from config import settings
+from .agent import root_agent, planner_agent, specialist_agents, CONTEXT_CACHE_CONFIG
+
+APP_NAME = "buick_ai_concierge"
+
+REDIS_URL = settings.redis_url
+SESSION_TTL_SECONDS = settings.session_ttl_seconds
+
+if REDIS_URL:
+    # Imported here so redis is only required when it is actually used
+    from .redis_session_service import RedisSessionService
+
+    SESSION_SERVICE = RedisSessionService(REDIS_URL, ttl_seconds=SESSION_TTL_SECONDS)
+else:
+    SESSION_SERVICE = InMemorySessionService()
+
+
+def make_runner(agent) -> Runner:
+    """Builds a runner for an agent with context caching of its static prompt prefix."""
+    return Runner(
+        app=App(
+            name=APP_NAME,
+            root_agent=agent,
+            context_cache_config=CONTEXT_CACHE_CONFIG,
+        ),
+        session_service=SESSION_SERVICE,
+    )
+
+
+# The orchestrator, the parallel-dispatch planner, and each specialist by name
+RUNNER = make_runner(root_agent)
+PLANNER_RUNNER = make_runner(planner_agent)
+SPECIALIST_RUNNERS = {name: make_runner(agent) for name, agent in specialist_agents.items()}
@@ -1,98 +1,374 @@
 import asyncio
-import os
+import queue
+import threading
+import time
 import uuid
 import json
-from flask import Flask, render_template, request, jsonify, session
-from dotenv import load_dotenv
+import re
+from collections import OrderedDict
+from flask import Flask, Response, render_template, request, session
 import logging # Import the logging module
+from typing import Callable, Iterator, Optional
 
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.events import Event
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
 from google.genai import types
 
+from config import settings
 # Import the main agent from our agent package
-from agent.agent import root_agent
+from agent import fast_router
+from agent.runtime import APP_NAME, SESSION_SERVICE, SESSION_TTL_SECONDS, RUNNER, PLANNER_RUNNER, SPECIALIST_RUNNERS
+from helpers import response_cache
+from helpers.json_stream import TextFieldStreamer
+
+# orjson is a faster drop-in for parsing agent output and serializing responses;
+# fall back to the standard library if it isn't installed.
+try:
+    import orjson
+
+    json_loads = orjson.loads
+
+    def json_dumps(data) -> bytes:
+        return orjson.dumps(data)
+except ImportError:
+    json_loads = json.loads
+
+    def json_dumps(data) -> bytes:
+        return json.dumps(data).encode("utf-8")
 
 # --- Basic Configuration for Logging ---
 logging.basicConfig(level=logging.INFO)
 
-# Load environment variables from .env file
-load_dotenv()
-
 app = Flask(__name__)
-app.secret_key = os.getenv("FLASK_SECRET_KEY", "a-very-secret-key-for-development")
-
-# --- ADK Runner and Session Management ---
-session_service = InMemorySessionService()
-runner = Runner(
-    agent=root_agent,
-    app_name="buick_ai_concierge",
-    session_service=session_service,
-)
-
-_created_sessions = set()
-
-async def get_or_create_session(user_id: str) -> str:
-    """Gets or creates a session for a given user."""
-    session_id = f"session_for_{user_id}"
-    if session_id not in _created_sessions:
-        logging.info(f"Creating new session {session_id} for user {user_id}")
-        await session_service.create_session(
-            app_name="buick_ai_concierge", user_id=user_id, session_id=session_id
-        )
-        _created_sessions.add(session_id)
+app.secret_key = settings.flask_secret_key
+
+# --- Background Event Loop ---
+# A single long-lived loop serves every request, so the ADK runner and the
+# underlying Gemini client connections are reused instead of being rebuilt
+# by asyncio.run() on each /chat call.
+_loop = asyncio.new_event_loop()
+threading.Thread(target=_loop.run_forever, name="agent-event-loop", daemon=True).start()
+
+# Streams partial model output as it is generated instead of only the final event.
+STREAMING_RUN_CONFIG = RunConfig(streaming_mode=StreamingMode.SSE)
+
+# --- Parallel Dispatch Configuration ---
+# When enabled, a planner agent splits the query into specialist sub-queries that
+# run concurrently, instead of the orchestrator calling specialists one at a time.
+PARALLEL_DISPATCH = settings.parallel_dispatch
+MAX_CONCURRENT_AGENTS = settings.max_concurrent_agents
+AGENT_TIMEOUT_SECONDS = settings.agent_timeout_seconds
+
+# --- Session Management ---
+# Sessions this process has recently confirmed exist, as an LRU of
+# session_id -> last confirmation time. All handlers run on the single background
+# loop, so these are only touched from one thread; the per-session lock stops two
+# concurrent first messages from the same user both creating the session.
+# Entries are re-checked against the session service after KNOWN_SESSION_TTL_SECONDS
+# so sessions expired by Redis (or created by another worker) are handled.
+MAX_KNOWN_SESSIONS = 100_000
+KNOWN_SESSION_TTL_SECONDS = SESSION_TTL_SECONDS // 2
+_known_sessions = OrderedDict()
+_session_locks = {}
+
+def _is_recently_confirmed(session_id: str) -> bool:
+    last_confirmed = _known_sessions.get(session_id)
+    return last_confirmed is not None and time.monotonic() - last_confirmed < KNOWN_SESSION_TTL_SECONDS
+
+async def get_or_create_session(user_id: str, suffix: str = "") -> str:
+    """Gets or creates a session for a given user, optionally scoped by a suffix."""
+    session_id = f"session_for_{user_id}{suffix}"
+    if _is_recently_confirmed(session_id):
+        _known_sessions.move_to_end(session_id)
+        return session_id
+
+    lock = _session_locks.setdefault(session_id, asyncio.Lock())
+    async with lock:
+        if not _is_recently_confirmed(session_id):
+            existing = await SESSION_SERVICE.get_session(
+                app_name=APP_NAME, user_id=user_id, session_id=session_id
+            )
+            if existing is None:
+                logging.info(f"Creating new session {session_id} for user {user_id}")
+                await SESSION_SERVICE.create_session(
+                    app_name=APP_NAME, user_id=user_id, session_id=session_id
+                )
+            _known_sessions[session_id] = time.monotonic()
+            _known_sessions.move_to_end(session_id)
+            while len(_known_sessions) > MAX_KNOWN_SESSIONS:
+                _known_sessions.popitem(last=False)
+    _session_locks.pop(session_id, None)
     return session_id
 
-async def invoke_agent_and_process_response(user_id: str, message: str) -> dict:
+async def append_turn(user_id: str, message: str, response_data: dict) -> None:
     """
-    Invokes the agent and processes the final response for the frontend.
+    Records a turn that was answered without the orchestrator (from the response
+    cache, the fast router or parallel dispatch) in the orchestrator's session, so
+    later messages are interpreted with it in the history.
     """
     session_id = await get_or_create_session(user_id)
+    session = await SESSION_SERVICE.get_session(
+        app_name=APP_NAME, user_id=user_id, session_id=session_id
+    )
+    if session is None:
+        return
+    invocation_id = f"e-{uuid.uuid4()}"
+    user_event = Event(
+        invocation_id=invocation_id,
+        author="user",
+        content=types.Content(role="user", parts=[types.Part(text=message)]),
+    )
+    model_event = Event(
+        invocation_id=invocation_id,
+        author=RUNNER.agent.name,
+        content=types.Content(
+            role="model", parts=[types.Part(text=json_dumps(response_data).decode("utf-8"))]
+        ),
+    )
+    await SESSION_SERVICE.append_event(session, user_event)
+    await SESSION_SERVICE.append_event(session, model_event)
+
+async def run_agent(
+    agent_runner: Runner,
+    user_id: str,
+    session_id: str,
+    message: str,
+    on_partial: Optional[Callable[[str], None]] = None,
+) -> str:
+    """
+    Runs a single agent turn and returns the text of its final response.
+
+    If on_partial is given, the model output is streamed and each partial text
+    chunk is passed to it as it arrives.
+    """
     user_content = types.Content(role="user", parts=[types.Part(text=message)])
 
     final_agent_output = ""
-    # Stream events from the agent to get the final raw output
-    async for event in runner.run_async(
-        user_id=user_id, session_id=session_id, new_message=user_content
+    # Stream events from the agent to get the final raw output. Only the first
+    # part's text is used; tool call/response events are handled inside ADK.
+    async for event in agent_runner.run_async(
+        user_id=user_id,
+        session_id=session_id,
+        new_message=user_content,
+        run_config=STREAMING_RUN_CONFIG if on_partial else None,
     ):
-        if event.is_final_response() and event.content and event.content.parts:
-            final_agent_output = event.content.parts[0].text
+        content = event.content
+        if content is None or not content.parts:
+            continue
+        text = content.parts[0].text
+        if event.partial:
+            if on_partial is not None and text:
+                on_partial(text)
+        elif event.is_final_response():
+            final_agent_output = text
+            _log_cache_usage(agent_runner, event.usage_metadata)
+    return final_agent_output
+
+def _log_cache_usage(agent_runner: Runner, usage_metadata) -> None:
+    """Logs how much of the prompt was served from the context cache (0 means a cache miss)."""
+    if usage_metadata is None:
+        return
+    logging.debug(
+        "%s: %s of %s prompt tokens served from cache",
+        agent_runner.agent.name,
+        usage_metadata.cached_content_token_count or 0,
+        usage_metadata.prompt_token_count,
+    )
+
+async def plan_query(user_id: str, message: str) -> list:
+    """
+    Asks the planner agent which specialists to call, returning a list of
+    (agent_name, sub_query) tuples. An empty list means "use the orchestrator".
+    """
+    session_id = await get_or_create_session(user_id, suffix="_planner")
+    raw_plan = await run_agent(PLANNER_RUNNER, user_id, session_id, message)
+    try:
+        # The planner uses structured output, so its response is plain JSON
+        calls = json_loads(raw_plan)["calls"] if raw_plan else []
+        return [
+            (call["agent"], call["query"])
+            for call in calls
+            if call.get("agent") in SPECIALIST_RUNNERS and call.get("query")
+        ]
+    except (json.JSONDecodeError, TypeError, AttributeError, KeyError) as e:
+        logging.error(f"Failed to parse planner output, falling back to orchestrator: {e}")
+        return []
+
+async def dispatch_parallel(user_id: str, calls: list) -> dict:
+    """
+    Runs the planned specialist calls concurrently and merges their responses,
+    keeping rich content in the order of the original plan.
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_AGENTS)
+
+    async def _call_specialist(agent_name: str, sub_query: str) -> dict:
+        async with semaphore:
+            session_id = await get_or_create_session(user_id, suffix=f"_{agent_name}")
+            raw_output = await asyncio.wait_for(
+                run_agent(SPECIALIST_RUNNERS[agent_name], user_id, session_id, sub_query),
+                timeout=AGENT_TIMEOUT_SECONDS,
+            )
+            return parse_agent_output(raw_output)
+
+    results = await asyncio.gather(
+        *(_call_specialist(agent_name, sub_query) for agent_name, sub_query in calls),
+        return_exceptions=True,
+    )
+
+    texts, rich_content = [], []
+    for (agent_name, _), result in zip(calls, results):
+        if isinstance(result, BaseException):
+            logging.error(f"Specialist {agent_name} failed during parallel dispatch: {result!r}")
+            continue
+        texts.append(result["text"])
+        rich_content.extend(result["rich_content"])
+
+    if not texts:
+        return {"text": "Sorry, I couldn't find that information right now.", "rich_content": []}
+    return {"text": " ".join(texts), "rich_content": rich_content}
+
+async def invoke_agent_and_process_response(
+    user_id: str, message: str, on_partial: Optional[Callable[[str], None]] = None
+) -> dict:
+    """
+    Returns a cached response for repeated lookups, otherwise invokes the agent.
+    """
+    cached_response, cache_key = await response_cache.lookup(user_id, message)
+    if cached_response is not None:
+        logging.info(f"Serving cached response for: {cache_key.text}")
+        await append_turn(user_id, message, cached_response)
+        return cached_response
+
+    # This turn moves the conversation on, so earlier answers may no longer apply
+    response_cache.invalidate(user_id)
+    response_data = await invoke_agent(user_id, message, on_partial)
+    response_cache.store(cache_key, response_data)
+    return response_data
+
+async def invoke_agent(
+    user_id: str, message: str, on_partial: Optional[Callable[[str], None]] = None
+) -> dict:
+    """
+    Invokes the agent and processes the final response for the frontend.
+    """
+    fast_route = fast_router.route(message)
+    if fast_route is not None:
+        if fast_route.response is not None:
+            response_data = dict(fast_route.response)
+        else:
+            logging.info(f"Fast-routing message directly to {fast_route.agent_name}")
+            session_id = await get_or_create_session(user_id, suffix=f"_{fast_route.agent_name}")
+            raw_output = await run_agent(
+                SPECIALIST_RUNNERS[fast_route.agent_name], user_id, session_id, message, on_partial
+            )
+            response_data = parse_agent_output(raw_output)
+        # The orchestrator didn't see this turn; record it so follow-ups have context
+        await append_turn(user_id, message, response_data)
+        return response_data
+
+    if PARALLEL_DISPATCH:
+        calls = await plan_query(user_id, message)
+        if calls:
+            response_data = await dispatch_parallel(user_id, calls)
+            # As with fast routes, record the turn the orchestrator didn't see
+            await append_turn(user_id, message, response_data)
+            return response_data
+
+    session_id = await get_or_create_session(user_id)
+    final_agent_output = await run_agent(RUNNER, user_id, session_id, message, on_partial)
 
     # --- DEBUGGING: Log the raw output ---
     logging.info("--- Raw Agent Output ---")
     logging.info(final_agent_output)
     logging.info("------------------------")
-    
-    # Attempt to parse the raw output into the expected JSON format
-    try:
-        # Clean up potential markdown formatting from the LLM
-        if "```json" in final_agent_output:
-            json_str = final_agent_output.split("```json")[1].split("```")[0]
-        else:
-            json_str = final_agent_output
-
-        # The model sometimes returns an incomplete JSON string; this finds the last valid bracket
-        last_bracket_index = json_str.rfind('}')
-        if last_bracket_index != -1:
-            clean_json_str = json_str[:last_bracket_index + 1]
-            response_data = json.loads(clean_json_str)
-            
-            # Ensure the response has the keys the frontend expects, even if empty
-            if 'text' not in response_data:
-                response_data['text'] = "Here is the information I found."
-            if 'rich_content' not in response_data:
-                response_data['rich_content'] = []
 
-            return response_data
-        else:
-            # If no JSON is found, return the text directly
-            return {"text": final_agent_output, "rich_content": []}
+    return parse_agent_output(final_agent_output)
+
+# Matches the body of a ```json fenced block in model output
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)\s*```", re.DOTALL)
+_JSON_DECODER = json.JSONDecoder()
+
+def load_json_value(raw_output: str, start_char: str):
+    """
+    Parses the first JSON value that begins with start_char ("{" or "[") in raw
+    model output, ignoring markdown fences and any text after the value.
+
+    Returns None if the output contains no such value.
+    """
+    match = _FENCE_RE.search(raw_output)
+    candidate = match.group(1) if match else raw_output
+    start = candidate.find(start_char)
+    if start == -1:
+        return None
+    try:
+        # Fast path: the rest of the candidate is exactly one JSON value
+        return json_loads(candidate[start:])
+    except json.JSONDecodeError:
+        # raw_decode stops at the end of the value, so trailing text and "}"
+        # characters inside string values are handled correctly
+        return _JSON_DECODER.raw_decode(candidate, start)[0]
 
-    except (json.JSONDecodeError, IndexError) as e:
+def parse_agent_output(final_agent_output: str) -> dict:
+    """
+    Parses an agent's raw output into the {text, rich_content} shape the frontend expects.
+    """
+    try:
+        response_data = load_json_value(final_agent_output, "{")
+    except json.JSONDecodeError as e:
         logging.error(f"Failed to parse agent's JSON response: {e}")
         # If parsing fails, return the raw text to avoid crashing the UI
         return {"text": final_agent_output, "rich_content": []}
 
+    # The JSON decoders only ever produce plain dicts, so an exact type check suffices
+    if type(response_data) is not dict:
+        # If no JSON is found, return the text directly
+        return {"text": final_agent_output, "rich_content": []}
+
+    # Ensure the response has the keys the frontend expects, even if empty
+    response_data.setdefault("text", "Here is the information I found.")
+    response_data.setdefault("rich_content", [])
+    return response_data
+
+
+def json_response(data, status: int = 200):
+    """Builds a JSON response using the fastest available serializer."""
+    return app.response_class(json_dumps(data), status=status, mimetype="application/json")
+
+def stream_chat_events(user_id: str, message: str) -> Iterator[str]:
+    """
+    Yields Server-Sent Events for one chat turn: a `delta` event for each new piece
+    of the agent's text as it streams, then a `final` event with the full
+    {text, rich_content} response (or an `error` event).
+    """
+    events = queue.Queue()
+    streamer = TextFieldStreamer()
+
+    def on_partial(chunk: str) -> None:
+        # The preview is best-effort; the final event always carries the full response
+        try:
+            delta = streamer.feed(chunk)
+        except Exception as e:
+            logging.warning(f"Skipping streamed chunk that could not be decoded: {e}")
+            return
+        if delta:
+            events.put(("delta", {"delta": delta}))
+
+    async def produce() -> None:
+        try:
+            response_data = await invoke_agent_and_process_response(user_id, message, on_partial)
+            events.put(("final", response_data))
+        except Exception as e:
+            logging.error(f"Error in /chat endpoint: {e}")
+            events.put(("error", {"error": "Sorry, an internal error occurred."}))
+        finally:
+            events.put(None)
+
+    asyncio.run_coroutine_threadsafe(produce(), _loop)
+    while (event := events.get()) is not None:
+        name, payload = event
+        yield f"event: {name}\ndata: {json_dumps(payload).decode('utf-8')}\n\n"
+
 
 @app.route("/")
 def index():
@@ -106,20 +382,18 @@ def chat():
     """Handles chat messages from the user."""
     message = request.json.get("message")
     if not message:
-        return jsonify({"error": "Message cannot be empty."}), 400
+        return json_response({"error": "Message cannot be empty."}, 400)
 
     if "user_id" not in session:
         session["user_id"] = str(uuid.uuid4())
     
     user_id = session["user_id"]
 
-    try:
-        response_data = asyncio.run(invoke_agent_and_process_response(user_id, message))
-        return jsonify(response_data)
-        
-    except Exception as e:
-        logging.error(f"Error in /chat endpoint: {e}")
-        return jsonify({"error": "Sorry, an internal error occurred."}), 500
+    return Response(
+        stream_chat_events(user_id, message),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 if __name__ == "__main__":
     app.run(debug=True, port=8080)
@@ -0,0 +1,83 @@
+"""
+Application settings, loaded once per process.
+
+The .env file is read and the Google Cloud environment variables the ADK and
+genai clients expect are set the first time this module is imported. Every other
+module reads configuration from `settings` instead of calling os.getenv().
+"""
+import functools
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+from dotenv import load_dotenv
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default) == "1"
+
+
+@dataclass(frozen=True)
+class Settings:
+    # --- Vertex AI / Google Cloud ---
+    vertex_ai_project_id: Optional[str]
+    vertex_ai_location: Optional[str]
+    vertex_ai_engine_id: Optional[str]
+    gemini_model: str
+    gemini_image_model: str
+    embedding_model: str
+    gcs_bucket_name: Optional[str]
+    gcs_destination_folder: Optional[str]
+
+    # --- Web app ---
+    flask_secret_key: str
+    parallel_dispatch: bool
+    max_concurrent_agents: int
+    agent_timeout_seconds: float
+
+    # --- Caching and sessions ---
+    response_cache: bool
+    response_cache_semantic: bool
+    context_cache_ttl_seconds: int
+    search_sessions: bool
+    redis_url: Optional[str]
+    session_ttl_seconds: int
+
+
+@functools.cache
+def _load_env() -> Settings:
+    """Reads .env and the environment into a Settings instance (once per process)."""
+    load_dotenv()
+
+    project_id = os.getenv("VERTEX_AI_PROJECT_ID")
+    location = os.getenv("VERTEX_AI_LOCATION")
+    # ADK builds its genai client from these; don't clobber values set explicitly
+    if project_id:
+        os.environ.setdefault("GOOGLE_CLOUD_PROJECT", project_id)
+    if location:
+        os.environ.setdefault("GOOGLE_CLOUD_LOCATION", location)
+    os.environ.setdefault("GOOGLE_GENAI_USE_VERTEXAI", "True")
+
+    return Settings(
+        vertex_ai_project_id=project_id,
+        vertex_ai_location=location,
+        vertex_ai_engine_id=os.getenv("VERTEX_AI_ENGINE_ID"),
+        gemini_model=os.getenv("GEMINI_MODEL", "gemini-1.5-flash-latest"),
+        gemini_image_model=os.getenv("GEMINI_IMAGE_MODEL", "gemini-2.0-flash-preview-image-generation"),
+        embedding_model=os.getenv("EMBEDDING_MODEL", "text-embedding-005"),
+        gcs_bucket_name=os.getenv("GCS_BUCKET_NAME"),
+        gcs_destination_folder=os.getenv("GCS_DESTINATION_FOLDER"),
+        flask_secret_key=os.getenv("FLASK_SECRET_KEY", "a-very-secret-key-for-development"),
+        parallel_dispatch=_env_flag("PARALLEL_DISPATCH", "0"),
+        max_concurrent_agents=int(os.getenv("MAX_CONCURRENT_AGENTS", "4")),
+        agent_timeout_seconds=float(os.getenv("AGENT_TIMEOUT_SECONDS", "30")),
+        response_cache=_env_flag("RESPONSE_CACHE", "1"),
+        response_cache_semantic=_env_flag("RESPONSE_CACHE_SEMANTIC", "0"),
+        context_cache_ttl_seconds=int(os.getenv("CONTEXT_CACHE_TTL_SECONDS", "3600")),
+        search_sessions=_env_flag("SEARCH_SESSIONS", "0"),
+        redis_url=os.getenv("REDIS_URL"),
+        session_ttl_seconds=int(os.getenv("SESSION_TTL_SECONDS", "3600")),
+    )
+
+
+settings = _load_env()
@@ -0,0 +1,101 @@
+"""
+Gemini helpers shared by the concierge's tools.
+
+Provides the process-wide genai client, and image editing with Gemini both as a
+coroutine (awaited by tools/image_editor_tool.py) and as a blocking call.
+"""
+import logging
+from typing import Optional
+
+import httpx
+from google import genai
+from google.genai import types
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+IMAGE_MODEL_NAME = settings.gemini_image_model
+# Sized for parallel agent dispatch sharing one client
+MAX_GENAI_CONNECTIONS = 64
+GENAI_TIMEOUT_MS = 60_000
+
+# One client, and so one pair of keep-alive HTTP/2 connection pools, for the whole
+# process. Passing explicit transports keeps the SDK on httpx (it may otherwise
+# pick aiohttp for async calls) and lets concurrent requests multiplex over
+# already-open connections instead of each paying a TCP/TLS handshake.
+genai_client = genai.Client(
+    vertexai=True,
+    project=settings.vertex_ai_project_id,
+    location=settings.vertex_ai_location,
+    http_options=types.HttpOptions(
+        api_version="v1",
+        timeout=GENAI_TIMEOUT_MS,
+        client_args={
+            "transport": httpx.HTTPTransport(
+                http2=True, limits=httpx.Limits(max_connections=MAX_GENAI_CONNECTIONS)
+            ),
+        },
+        async_client_args={
+            "transport": httpx.AsyncHTTPTransport(
+                http2=True, limits=httpx.Limits(max_connections=MAX_GENAI_CONNECTIONS)
+            ),
+        },
+    ),
+)
+
+# Built once; the config is identical for every edit call
+_IMAGE_EDIT_CONFIG = types.GenerateContentConfig(response_modalities=["TEXT", "IMAGE"])
+
+
+def _extract_image_bytes(response: types.GenerateContentResponse) -> Optional[bytes]:
+    """Returns the first inline image in a Gemini response, or None if there is none."""
+    if not response.candidates or not response.candidates[0].content:
+        return None
+    for part in response.candidates[0].content.parts or []:
+        if part.inline_data and part.inline_data.data:
+            return part.inline_data.data
+    return None
+
+
+def _edit_contents(image_bytes: bytes, mime_type: str, prompt: str) -> list:
+    return [types.Part.from_bytes(data=image_bytes, mime_type=mime_type), prompt]
+
+
+def edit_image_from_bytes(image_bytes: bytes, mime_type: str, prompt: str) -> Optional[bytes]:
+    """
+    Edits an image with Gemini.
+
+    Args:
+        image_bytes: The raw bytes of the image to edit.
+        mime_type: The image's MIME type (e.g., "image/jpeg").
+        prompt: The text instruction describing the desired edit.
+
+    Returns:
+        The edited image bytes, or None if the model did not return an image.
+    """
+    try:
+        response = genai_client.models.generate_content(
+            model=IMAGE_MODEL_NAME,
+            contents=_edit_contents(image_bytes, mime_type, prompt),
+            config=_IMAGE_EDIT_CONFIG,
+        )
+        return _extract_image_bytes(response)
+    except Exception as e:
+        logger.error(f"Gemini image edit failed: {e}")
+        return None
+
+
+async def edit_image_from_bytes_async(image_bytes: bytes, mime_type: str, prompt: str) -> Optional[bytes]:
+    """Async version of edit_image_from_bytes that does not block the event loop."""
+    try:
+        response = await genai_client.aio.models.generate_content(
+            model=IMAGE_MODEL_NAME,
+            contents=_edit_contents(image_bytes, mime_type, prompt),
+            config=_IMAGE_EDIT_CONFIG,
+        )
+        return _extract_image_bytes(response)
+    except Exception as e:
+        logger.error(f"Gemini image edit failed: {e}")
+        return None
@@ -0,0 +1,80 @@
+"""
+Incremental extraction of the agent's "text" field while its JSON envelope streams in.
+
+The agents answer with a JSON object such as {"text": "...", "rich_content": [...]}.
+Streaming that raw JSON to the browser is not useful, so TextFieldStreamer decodes
+the "text" value chunk by chunk and returns only the newly available characters.
+"""
+import json
+import re
+
+# orjson decodes each streamed fragment faster; fall back to the standard library
+# if it isn't installed.
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+_TEXT_KEY_RE = re.compile(r'"text"\s*:\s*"')
+
+
+class TextFieldStreamer:
+    """Feeds streamed chunks of a JSON envelope and yields decoded "text" deltas."""
+
+    def __init__(self):
+        self._buffer = ""
+        self._scan_pos = None  # Start of the undecoded part of the text value
+        self._done = False
+
+    def feed(self, chunk: str) -> str:
+        """
+        Adds a chunk of streamed output.
+
+        Args:
+            chunk: The next piece of the agent's raw output.
+
+        Returns:
+            The newly decoded characters of the "text" value, or "" if none are available yet.
+        """
+        self._buffer += chunk
+        if self._done:
+            return ""
+
+        if self._scan_pos is None:
+            match = _TEXT_KEY_RE.search(self._buffer)
+            if not match:
+                return ""
+            self._scan_pos = match.end()
+
+        buffer = self._buffer
+        start = end = self._scan_pos
+        while end < len(buffer):
+            char = buffer[end]
+            if char == '"':
+                self._done = True
+                break
+            if char != "\\":
+                end += 1
+                continue
+            # Only consume complete escape sequences; keep surrogate pairs together.
+            step = 2
+            if buffer[end + 1:end + 2] == "u":
+                step = 6
+                if "d800" <= buffer[end + 2:end + 6].lower() <= "dbff":
+                    step = 12
+            if end + step > len(buffer):
+                break
+            end += step
+
+        self._scan_pos = end
+        if end == start:
+            return ""
+        fragment = f'"{buffer[start:end]}"'
+        try:
+            return json_loads(fragment)
+        except ValueError:
+            # Models sometimes emit raw newlines or tabs inside strings
+            try:
+                return json.loads(fragment, strict=False)
+            except ValueError:
+                return ""
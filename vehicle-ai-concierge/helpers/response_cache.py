@@ -0,0 +1,175 @@
+"""
+Response cache for the concierge's /chat endpoint.
+
+Repeated questions ("find a dealership in 02090") are answered from memory
+instead of another round-trip through the agents. There are two tiers:
+
+- Exact: keyed on the user and the normalized message.
+- Semantic (opt-in via RESPONSE_CACHE_SEMANTIC=1): the message is embedded and
+  compared against the user's recently cached messages; a cosine similarity above
+  SIMILARITY_THRESHOLD counts as a hit, provided both messages contain the same
+  numbers (zip codes, years, part numbers).
+
+Answers depend on the conversation so far ("show me dealerships" after a zip
+code), so entries are scoped to one user and dropped by invalidate() whenever
+that user's conversation moves on through the agents. Only responses that carry
+lookup results are cached; conversational turns (greetings, lead-generation
+questions and confirmations) are always sent to the agents.
+"""
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+from config import settings
+from helpers import gemini_helper
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+CACHE_ENABLED = settings.response_cache
+SEMANTIC_CACHE_ENABLED = settings.response_cache_semantic
+EMBEDDING_MODEL = settings.embedding_model
+MAX_USERS = 4096
+MAX_ENTRIES_PER_USER = 32
+SIMILARITY_THRESHOLD = 0.95
+# Dealership and parts data can change; website content changes less often.
+LOOKUP_TTL_SECONDS = 600
+WEBSITE_TTL_SECONDS = 3600
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+_NUMBER_RE = re.compile(r"\d+")
+
+
+class _Entry(NamedTuple):
+    expires_at: float
+    response: Dict[str, Any]
+    vector: Optional[np.ndarray]
+
+
+# user_id -> (normalized message -> entry), both levels in LRU order
+_entries: "OrderedDict[str, OrderedDict[str, _Entry]]" = OrderedDict()
+
+
+class CacheKey(NamedTuple):
+    """Identifies a message for a later store(); the vector is None when the semantic tier is off."""
+    user_id: str
+    text: str
+    vector: Optional[np.ndarray]
+
+
+def normalize_message(message: str) -> str:
+    """Lowercases, strips punctuation, and collapses whitespace."""
+    return " ".join(_PUNCTUATION_RE.sub(" ", message.lower()).split())
+
+
+def _ttl_for(response: Dict[str, Any]) -> Optional[float]:
+    """
+    Returns how long a response may be cached, or None if it must not be cached.
+    """
+    rich_content = response.get("rich_content") or []
+    if not rich_content or not isinstance(rich_content[0], dict):
+        return None
+    first_item = rich_content[0]
+    if "pageUrl" in first_item:
+        return WEBSITE_TTL_SECONDS
+    if "address" in first_item or "part_number" in first_item:
+        return LOOKUP_TTL_SECONDS
+    return None
+
+
+def _get_exact(user_entries: "OrderedDict[str, _Entry]", text: str) -> Optional[Dict[str, Any]]:
+    entry = user_entries.get(text)
+    if entry is None:
+        return None
+    if entry.expires_at < time.monotonic():
+        del user_entries[text]
+        return None
+    user_entries.move_to_end(text)
+    return entry.response
+
+
+async def _embed(text: str) -> Optional[np.ndarray]:
+    """Embeds text with Vertex AI, returning a unit-length vector or None on failure."""
+    try:
+        result = await gemini_helper.genai_client.aio.models.embed_content(
+            model=EMBEDDING_MODEL, contents=text
+        )
+        vector = np.asarray(result.embeddings[0].values, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+    except Exception as e:
+        logger.warning(f"Embedding failed, skipping semantic cache: {e}")
+        return None
+
+
+def _find_similar(user_entries: "OrderedDict[str, _Entry]", text: str, vector: np.ndarray) -> Optional[Dict[str, Any]]:
+    """Returns the response cached for the most similar message, if it is similar enough."""
+    candidates = [
+        (cached_text, entry.vector)
+        for cached_text, entry in user_entries.items()
+        if entry.vector is not None
+    ]
+    if not candidates:
+        return None
+    keys, vectors = zip(*candidates)
+    similarities = np.stack(vectors) @ vector
+    best = int(np.argmax(similarities))
+    if similarities[best] < SIMILARITY_THRESHOLD:
+        return None
+    # Embeddings barely separate "dealers near 02090" from "... 02091"
+    if _NUMBER_RE.findall(text) != _NUMBER_RE.findall(keys[best]):
+        return None
+    response = _get_exact(user_entries, keys[best])
+    if response is not None:
+        logger.info(f"Semantic cache hit ({similarities[best]:.3f}): '{text}' ~ '{keys[best]}'")
+    return response
+
+
+async def lookup(user_id: str, message: str) -> Tuple[Optional[Dict[str, Any]], CacheKey]:
+    """
+    Looks up a cached response for a user's message.
+
+    Returns:
+        A tuple of (cached response or None, key to pass to store() on a miss).
+    """
+    text = normalize_message(message)
+    user_entries = _entries.get(user_id) if CACHE_ENABLED else None
+    if not user_entries:
+        # Nothing to match against; only embed if the response may be stored
+        vector = await _embed(text) if CACHE_ENABLED and SEMANTIC_CACHE_ENABLED else None
+        return None, CacheKey(user_id, text, vector)
+
+    response = _get_exact(user_entries, text)
+    if response is not None or not SEMANTIC_CACHE_ENABLED:
+        return response, CacheKey(user_id, text, None)
+
+    vector = await _embed(text)
+    if vector is not None:
+        response = _find_similar(user_entries, text, vector)
+    return response, CacheKey(user_id, text, vector)
+
+
+def store(key: CacheKey, response: Dict[str, Any]) -> None:
+    """Caches a response if it carries cacheable lookup results."""
+    if not CACHE_ENABLED:
+        return
+    ttl = _ttl_for(response)
+    if ttl is None:
+        return
+
+    user_entries = _entries.setdefault(key.user_id, OrderedDict())
+    _entries.move_to_end(key.user_id)
+    user_entries[key.text] = _Entry(time.monotonic() + ttl, response, key.vector)
+    user_entries.move_to_end(key.text)
+    while len(user_entries) > MAX_ENTRIES_PER_USER:
+        user_entries.popitem(last=False)
+    while len(_entries) > MAX_USERS:
+        _entries.popitem(last=False)
+
+
+def invalidate(user_id: str) -> None:
+    """Drops a user's cached responses, e.g. after a turn that changed their conversation."""
+    _entries.pop(user_id, None)
@@ -98,6 +98,67 @@ const toTitleCase = (str) => {
 };
 
 
+// Identifies which renderer a rich content item belongs to
+const richContentKind = (item) => {
+    if (item.pageUrl !== undefined && item.snippets !== undefined) return 'search';
+    if (item.address && item.phone) return 'dealer';
+    if (item.part_number && item.price) return 'part';
+    if (item.image_url) return 'image';
+    return null;
+};
+
+// Renders a run of rich content items that share the same kind
+const renderRichContentGroup = (kind, items) => {
+    // Case 1: Website Search Results
+    if (kind === 'search') {
+        const resultsId = `results-${Date.now()}-${Math.random().toString(36).slice(2, 8)}`;
+        window.searchResultsStore[resultsId] = items;
+
+        return `
+            <div class="mt-4">
+                <button class="search-results-chip" data-results-id="${resultsId}">
+                    <span class="material-icons mr-2 text-base">search</span>
+                    View ${items.length} Search Results
+                </button>
+            </div>
+        `;
+    }
+    // Case 2: Dealership Results
+    if (kind === 'dealer') {
+        let dealerCardsHtml = '<div class="mt-4 flex flex-col gap-3">';
+        items.forEach(dealer => {
+            window.dealershipsStore[dealer.id] = dealer;
+            dealerCardsHtml += `
+                <button class="clickable-card dealer-chip-card" data-dealer-id="${dealer.id}">
+                    <div class="dealer-name">${dealer.name}</div>
+                    <div class="dealer-address">${dealer.address}</div>
+                    <div class="dealer-phone">${dealer.phone}</div>
+                </button>
+            `;
+        });
+        return dealerCardsHtml + '</div>';
+    }
+    // Case 3: Accessory/Part Results
+    if (kind === 'part') {
+        let accessoryCardsHtml = '<div class="mt-4 flex flex-col gap-3">';
+        items.forEach(part => {
+            window.accessoriesStore[part.id] = part;
+            accessoryCardsHtml += `
+                <button class="clickable-card accessory-chip-card" data-accessory-id="${part.id}">
+                    <span class="accessory-name">${part.name}</span>
+                    <span class="accessory-price">$${part.price.toFixed(2)}</span>
+                </button>
+            `;
+        });
+        return accessoryCardsHtml + '</div>';
+    }
+    // Case 4: Edited Image
+    if (kind === 'image') {
+        return `<div class="edited-image-card mt-4"><img src="${items[0].image_url}" alt="Edited vehicle image"></div>`;
+    }
+    return '';
+};
+
 const displayAgentResponse = (response) => {
     const agentResponseDiv = document.createElement('div');
     agentResponseDiv.className = 'mb-6 animate-fade-in';
@@ -112,56 +173,21 @@ const displayAgentResponse = (response) => {
                            Object.keys(response.rich_content[0]).length > 0;
 
     if (hasRichContent) {
-        const firstItem = response.rich_content[0];
-
-        // Case 1: Website Search Results
-        if (firstItem.pageUrl !== undefined && firstItem.snippets !== undefined) {
-            const resultsId = `results-${Date.now()}`;
-            window.searchResultsStore[resultsId] = response.rich_content;
-
-            richContentHtml = `
-                <div class="mt-4">
-                    <button class="search-results-chip" data-results-id="${resultsId}">
-                        <span class="material-icons mr-2 text-base">search</span>
-                        View ${response.rich_content.length} Search Results
-                    </button>
-                </div>
-            `;
-        }
-        // Case 2: Dealership Results
-        else if (firstItem.address && firstItem.phone) {
-            let dealerCardsHtml = '<div class="mt-4 flex flex-col gap-3">';
-            response.rich_content.forEach(dealer => {
-                window.dealershipsStore[dealer.id] = dealer;
-                dealerCardsHtml += `
-                    <button class="clickable-card dealer-chip-card" data-dealer-id="${dealer.id}">
-                        <div class="dealer-name">${dealer.name}</div>
-                        <div class="dealer-address">${dealer.address}</div>
-                        <div class="dealer-phone">${dealer.phone}</div>
-                    </button>
-                `;
-            });
-            dealerCardsHtml += '</div>';
-            richContentHtml = dealerCardsHtml;
-        }
-        // Case 3: Accessory/Part Results
-        else if (firstItem.part_number && firstItem.price) {
-             let accessoryCardsHtml = '<div class="mt-4 flex flex-col gap-3">';
-            response.rich_content.forEach(part => {
-                window.accessoriesStore[part.id] = part;
-                accessoryCardsHtml += `
-                    <button class="clickable-card accessory-chip-card" data-accessory-id="${part.id}">
-                        <span class="accessory-name">${part.name}</span>
-                        <span class="accessory-price">$${part.price.toFixed(2)}</span>
-                    </button>
-                `;
-            });
-            accessoryCardsHtml += '</div>';
-            richContentHtml = accessoryCardsHtml;
-        }
-        // Case 4: Edited Image
-        else if (firstItem.image_url) {
-            richContentHtml = `<div class="edited-image-card mt-4"><img src="${firstItem.image_url}" alt="Edited vehicle image"></div>`;
+        // Responses merged from several specialists contain consecutive runs of
+        // different kinds; render each run with its own template.
+        let groupKind = null;
+        let groupItems = [];
+        response.rich_content.forEach(item => {
+            const kind = richContentKind(item);
+            if (kind !== groupKind && groupItems.length > 0) {
+                richContentHtml += renderRichContentGroup(groupKind, groupItems);
+                groupItems = [];
+            }
+            groupKind = kind;
+            groupItems.push(item);
+        });
+        if (groupItems.length > 0) {
+            richContentHtml += renderRichContentGroup(groupKind, groupItems);
         }
     }
     
@@ -175,6 +201,33 @@ const displayAgentResponse = (response) => {
     chatResults.scrollTop = chatResults.scrollHeight;
 };
 
+// Reads a Server-Sent Events stream from a fetch response, calling onEvent(name, data) per event
+const readEventStream = async (response, onEvent) => {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let eventName = 'message';
+            let data = '';
+            rawEvent.split('\n').forEach(line => {
+                if (line.startsWith('event:')) eventName = line.slice(6).trim();
+                else if (line.startsWith('data:')) data += line.slice(5).trim();
+            });
+            if (data) onEvent(eventName, JSON.parse(data));
+        }
+    }
+};
+
 const processQuery = async (queryOverride = null) => {
     const query = queryOverride || chatInput.innerText.trim();
     if (query === '') return;
@@ -196,16 +249,31 @@ const processQuery = async (queryOverride = null) => {
             body: JSON.stringify({ message: query }),
         });
 
-        chatResults.removeChild(loadingDiv); 
-
         if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
 
-        const data = await response.json();
-        displayAgentResponse(data);
+        // Show the agent's text as it streams in, then replace it with the full response
+        let streamedText = '';
+        let finalData = null;
+        await readEventStream(response, (eventName, data) => {
+            if (eventName === 'delta') {
+                streamedText += data.delta;
+                loadingDiv.innerHTML = '<div class="prose max-w-none text-base text-gray-700"></div>';
+                loadingDiv.firstChild.textContent = streamedText;
+                chatResults.scrollTop = chatResults.scrollHeight;
+            } else if (eventName === 'final') {
+                finalData = data;
+            } else if (eventName === 'error') {
+                throw new Error(data.error);
+            }
+        });
+
+        chatResults.removeChild(loadingDiv);
+        if (!finalData) throw new Error('Stream ended without a final response.');
+        displayAgentResponse(finalData);
 
     } catch (error) {
         console.error('Error fetching chat response:', error);
-        chatResults.removeChild(loadingDiv);
+        if (loadingDiv.parentNode) chatResults.removeChild(loadingDiv);
         displayAgentResponse({ text: "Sorry, I encountered an error. Please try again." });
     }
 };
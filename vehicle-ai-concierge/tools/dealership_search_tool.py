@@ -1,7 +1,27 @@
 import json
 import os
 import math
-from typing import List, Dict, Any
+import re
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple
+
+import numpy as np
+
+# orjson decodes the data files several times faster; fall back to the standard
+# library if it isn't installed.
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+# Numba is optional: when installed, the distance kernel is JIT-compiled to a
+# native loop; otherwise the vectorized NumPy expression is used.
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+__all__ = ["find_dealerships"]
 
 # --- Data Loading ---
 
@@ -20,8 +40,8 @@ def _load_data(file_name: str) -> Dict:
         project_root = os.path.dirname(script_dir)
         json_path = os.path.join(project_root, 'data', file_name)
         
-        with open(json_path, 'r') as f:
-            return json.load(f)
+        with open(json_path, 'rb') as f:
+            return json_loads(f.read())
     except FileNotFoundError:
         print(f"Error: The file '{file_name}' was not found.")
         return {}
@@ -33,23 +53,73 @@ def _load_data(file_name: str) -> Dict:
 DEALERSHIPS_DATA = _load_data("dealerships.json").get("dealerships", [])
 ZIP_CODES_DATA = _load_data("zip_codes.json").get("zip_codes", {})
 
+# Dealer coordinates in radians, in the same order as DEALERSHIPS_DATA, so all
+# distances can be computed in one vectorized expression. The cosine of each
+# dealer's latitude never changes, so it is computed once here, not per query.
+DEALER_LATS = np.radians(np.array([d['lat'] for d in DEALERSHIPS_DATA], dtype=np.float64))
+DEALER_LONS = np.radians(np.array([d['lon'] for d in DEALERSHIPS_DATA], dtype=np.float64))
+DEALER_COS_LATS = np.cos(DEALER_LATS)
+
+# zip code -> (lat in radians, lon in radians, cos(lat))
+ZIP_LOCATIONS: Dict[str, Tuple[float, float, float]] = {
+    zip_code: (math.radians(loc['lat']), math.radians(loc['lon']), math.cos(math.radians(loc['lat'])))
+    for zip_code, loc in ZIP_CODES_DATA.items()
+}
+
+# A 5-digit zip code, optionally in ZIP+4 form; only the first 5 digits are used
+_ZIP_RE = re.compile(r"^\s*(\d{5})(?:-\d{4})?\s*$")
+
+EARTH_RADIUS_MILES = 3958.8
+MAX_RESULTS = 5
+
 # --- Tool Function ---
 
-def _haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+def _haversine_all(
+    lat: float, lon: float, cos_lat: float, lats: np.ndarray, lons: np.ndarray, cos_lats: np.ndarray
+) -> np.ndarray:
     """
-    Calculates the distance between two lat/lon points in miles.
+    Calculates the distance in miles from a point to each of several points, all in radians,
+    given the precomputed cosines of their latitudes. Written as a plain loop so Numba can compile it.
     """
-    R = 3958.8  # Earth radius in miles
-    
-    dLat = math.radians(lat2 - lat1)
-    dLon = math.radians(lon2 - lon1)
-    lat1 = math.radians(lat1)
-    lat2 = math.radians(lat2)
-    
-    a = math.sin(dLat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dLon/2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-    
-    return R * c
+    distances = np.empty(lats.shape[0])
+    for i in range(lats.shape[0]):
+        a = math.sin((lats[i] - lat) / 2) ** 2 + cos_lat * cos_lats[i] * math.sin((lons[i] - lon) / 2) ** 2
+        distances[i] = 2 * EARTH_RADIUS_MILES * math.asin(math.sqrt(a))
+    return distances
+
+if njit is not None:
+    _haversine_all = njit(cache=True, fastmath=True)(_haversine_all)
+
+def _haversine_distances(lat: float, lon: float, cos_lat: float) -> np.ndarray:
+    """
+    Calculates the distance in miles from a point (in radians, see ZIP_LOCATIONS) to every dealership.
+    """
+    if njit is not None:
+        return _haversine_all(lat, lon, cos_lat, DEALER_LATS, DEALER_LONS, DEALER_COS_LATS)
+
+    a = (np.sin((DEALER_LATS - lat) / 2) ** 2
+         + cos_lat * DEALER_COS_LATS * np.sin((DEALER_LONS - lon) / 2) ** 2)
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(a))
+
+def _closest_indices(distances: np.ndarray, k: int) -> np.ndarray:
+    """
+    Returns the indices of the k smallest distances, closest first.
+    """
+    if k < len(distances):
+        # Partial selection is O(N); only the k selected entries are sorted
+        indices = np.argpartition(distances, k)[:k]
+        return indices[np.argsort(distances[indices])]
+    return np.argsort(distances)
+
+@lru_cache(maxsize=1024)
+def _closest_dealers(zip_code: str) -> Tuple[Tuple[int, float], ...]:
+    """
+    Returns (index into DEALERSHIPS_DATA, distance in miles) for the dealerships closest
+    to a known zip code. The data never changes after import, so results are cached per
+    zip code; only these small tuples are cached, never the dicts handed to callers.
+    """
+    distances = _haversine_distances(*ZIP_LOCATIONS[zip_code])
+    return tuple((int(i), round(float(distances[i]), 2)) for i in _closest_indices(distances, MAX_RESULTS))
 
 def find_dealerships(zip_code: str) -> Dict[str, Any]:
     """
@@ -64,29 +134,21 @@ def find_dealerships(zip_code: str) -> Dict[str, Any]:
     if not DEALERSHIPS_DATA or not ZIP_CODES_DATA:
         return {"count": 0, "dealerships": [], "message": "Dealership database is not loaded."}
         
-    user_location = ZIP_CODES_DATA.get(zip_code)
-    
-    if not user_location:
+    zip_match = _ZIP_RE.match(zip_code)
+    if not zip_match:
+        return {"count": 0, "dealerships": [], "message": f"'{zip_code}' is not a valid 5-digit zip code."}
+    zip_code = zip_match.group(1)
+
+    if zip_code not in ZIP_LOCATIONS:
         return {"count": 0, "dealerships": [], "message": f"Sorry, I couldn't find location information for the zip code {zip_code}."}
 
-    user_lat = user_location['lat']
-    user_lon = user_location['lon']
-    
-    # Calculate distance for each dealership
-    dealers_with_distance = []
-    for dealer in DEALERSHIPS_DATA:
-        distance = _haversine_distance(user_lat, user_lon, dealer['lat'], dealer['lon'])
-        # Add the calculated distance to the dealer's dictionary for sorting
-        dealer_copy = dealer.copy()
-        dealer_copy['distance_miles'] = round(distance, 2)
-        dealers_with_distance.append(dealer_copy)
-        
-    # Sort dealerships by distance
-    sorted_dealers = sorted(dealers_with_distance, key=lambda d: d['distance_miles'])
-    
-    # Return the top 5
-    closest_dealers = sorted_dealers[:5]
-    
+    # Copy only the closest dealerships, adding their distance
+    closest_dealers = []
+    for i, distance in _closest_dealers(zip_code):
+        dealer_copy = DEALERSHIPS_DATA[i].copy()
+        dealer_copy['distance_miles'] = distance
+        closest_dealers.append(dealer_copy)
+
     return {"count": len(closest_dealers), "dealerships": closest_dealers}
 
 if __name__ == '__main__':
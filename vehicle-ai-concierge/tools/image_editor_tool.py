@@ -1,32 +1,140 @@
+import asyncio
+import functools
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import uuid
 import datetime
-import os
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+from config import settings
 from helpers import gemini_helper
-from google.cloud import storage
-from typing import Dict
+from typing import TYPE_CHECKING, Dict, Tuple
 
-# Load environment variables
-load_dotenv()
+if TYPE_CHECKING:
+    from google.cloud import storage
+
+__all__ = ["edit_image"]
 
 # --- GCS Configuration ---
-# Read configuration from environment variables
-BUCKET_NAME = os.getenv("GCS_BUCKET_NAME")
-DESTINATION_FOLDER = os.getenv("GCS_DESTINATION_FOLDER")
-storage_client = storage.Client()
+BUCKET_NAME = settings.gcs_bucket_name
+DESTINATION_FOLDER = settings.gcs_destination_folder
+# Edited images are served via V4 signed URLs, generated locally from the service
+# account's key, so the bucket can stay private and no extra ACL call is needed.
+SIGNED_URL_EXPIRATION = datetime.timedelta(hours=1)
+
+# google-cloud-storage (and the gRPC/auth stack under it) is imported and the
+# client created on first use, so importing this module stays cheap when no
+# image is ever edited.
+@functools.lru_cache(maxsize=None)
+def _get_storage_client() -> "storage.Client":
+    from google.cloud import storage
+    return storage.Client()
+
+# A bucket handle is just a reference; building it once avoids redoing it per call
+@functools.lru_cache(maxsize=None)
+def _get_bucket() -> "storage.Bucket":
+    return _get_storage_client().bucket(BUCKET_NAME)
+
+def __getattr__(name: str):
+    # Keep `image_editor_tool.storage_client` / `.bucket` working for callers
+    if name == "storage_client":
+        return _get_storage_client()
+    if name == "bucket":
+        return _get_bucket()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-def edit_image(image_url: str, edit_instruction: str) -> Dict[str, str]:
+# One pooled session for all downloads, so repeated edits reuse keep-alive
+# connections instead of paying a TCP/TLS handshake each time
+http_session = requests.Session()
+_adapter = HTTPAdapter(
+    pool_maxsize=10,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504], allowed_methods=["GET"]),
+)
+http_session.mount("https://", _adapter)
+http_session.mount("http://", _adapter)
+
+# GCS work runs here, off the event loop: the first call builds the storage
+# client (loading credentials, possibly from the metadata server), then every
+# call uploads and signs
+_gcs_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="gcs-upload")
+
+# Gemini accepts inline images up to 20 MB per request
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+def _download_image(image_url: str) -> Tuple[bytes, str]:
+    """
+    Streams an image into memory, rejecting non-image responses before their body
+    is read and stopping once the download exceeds MAX_IMAGE_BYTES.
+
+    Returns:
+        The image bytes and their MIME type.
+
+    Raises:
+        ValueError: If the response is not an image or is too large.
+        requests.exceptions.RequestException: If the download fails.
+    """
+    with http_session.get(image_url, timeout=10, stream=True) as response:
+        response.raise_for_status()
+
+        mime_type = response.headers.get('Content-Type')
+        if not mime_type or not mime_type.startswith('image/'):
+            raise ValueError(f"Invalid content type '{mime_type}'.")
+        if int(response.headers.get('Content-Length') or 0) > MAX_IMAGE_BYTES:
+            raise ValueError("Image is too large to edit.")
+
+        # Chunks are joined once at the end: Gemini's Part takes bytes, and growing
+        # a bytearray then converting it would copy the whole image twice
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > MAX_IMAGE_BYTES:
+                raise ValueError("Image is too large to edit.")
+    return b"".join(chunks), mime_type
+
+def _image_url(blob: "storage.Blob") -> str:
+    """Returns a signed GET URL for the blob, or its public URL if signing is unavailable."""
+    try:
+        return blob.generate_signed_url(version="v4", expiration=SIGNED_URL_EXPIRATION, method="GET")
+    except (AttributeError, ValueError) as e:
+        # Credentials without a private key (e.g. user ADC) cannot sign locally
+        print(f"Could not sign URL ({e}); falling back to the public URL.")
+        return blob.public_url
+
+def _upload_image(image_bytes: bytes, mime_type: str) -> str:
+    """
+    Uploads an edited image to GCS under a unique name and returns its URL.
+    Blocks; run it on _gcs_executor.
+    """
+    # Generate a unique filename
+    timestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    unique_id = uuid.uuid4().hex[:6]
+    file_extension = mime_type.split('/')[-1]
+    unique_filename = f"edited_image_{timestamp}_{unique_id}.{file_extension}"
+    destination_blob_name = f"{DESTINATION_FOLDER}{unique_filename}"
+
+    # Upload the file; the name is unique, so only create, never overwrite
+    blob = _get_bucket().blob(destination_blob_name)
+    blob.upload_from_string(image_bytes, content_type=mime_type, if_generation_match=0)
+    return _image_url(blob)
+
+async def edit_image(image_url: str, edit_instruction: str) -> Dict[str, str]:
     """
     Downloads an image, edits it using Gemini, uploads it to GCS,
-    and returns the public URL.
+    and returns a signed URL for it.
+
+    The download and upload use blocking clients and run in worker threads, and
+    the Gemini call is awaited natively, so concurrent edits don't block the
+    event loop or each other.
 
     Args:
         image_url: The public URL of the image to edit.
         edit_instruction: The text prompt describing the desired edit.
 
     Returns:
-        A dictionary containing the status and either the public GCS URL
+        A dictionary containing the status and either a signed GCS URL
         of the edited image or an error message.
     """
     if not BUCKET_NAME or not DESTINATION_FOLDER:
@@ -35,43 +143,32 @@ def edit_image(image_url: str, edit_instruction: str) -> Dict[str, str]:
     print(f"Attempting to download image from: {image_url}")
     try:
         # Download the image
-        response = requests.get(image_url, timeout=10)
-        response.raise_for_status()
-        
-        image_bytes = response.content
-        mime_type = response.headers.get('Content-Type')
-
-        if not mime_type or not mime_type.startswith('image/'):
-            return {"status": "error", "message": f"Invalid content type '{mime_type}'."}
+        try:
+            image_bytes, mime_type = await asyncio.to_thread(_download_image, image_url)
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}
 
         print("Image downloaded. Sending to Gemini for editing...")
         # Call the helper to perform the edit
-        edited_image_bytes = gemini_helper.edit_image_from_bytes(
+        edited_image_bytes = await gemini_helper.edit_image_from_bytes_async(
             image_bytes=image_bytes, mime_type=mime_type, prompt=edit_instruction
         )
+        # The original image is no longer needed; don't hold it during the upload
+        del image_bytes
 
         if edited_image_bytes:
             print("Image edited. Uploading to GCS...")
-            
-            # Generate a unique filename
-            timestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
-            unique_id = uuid.uuid4().hex[:6]
-            file_extension = mime_type.split('/')[-1]
-            unique_filename = f"edited_image_{timestamp}_{unique_id}.{file_extension}"
-            destination_blob_name = f"{DESTINATION_FOLDER}{unique_filename}"
-            
-            # Get the bucket and upload the file
-            bucket = storage_client.bucket(BUCKET_NAME)
-            blob = bucket.blob(destination_blob_name)
-            blob.upload_from_string(edited_image_bytes, content_type=mime_type)
-            
-            # REMOVED: blob.make_public() - This line caused the error with
-            # uniform bucket-level access and is not needed for authenticated local testing.
-            
-            print(f"Upload successful. Public URL: {blob.public_url}")
+            # Only report success once the object exists, so the URL is never dead
+            try:
+                edited_image_url = await asyncio.wrap_future(
+                    _gcs_executor.submit(_upload_image, edited_image_bytes, mime_type)
+                )
+            except Exception as e:
+                return {"status": "error", "message": f"Failed to upload edited image: {e}"}
+            print(f"Upload successful. URL: {edited_image_url}")
             return {
                 "status": "success",
-                "image_url": blob.public_url,
+                "image_url": edited_image_url,
                 "message": "Image successfully edited and uploaded."
             }
         else:
@@ -90,7 +187,7 @@ if __name__ == '__main__':
     print(f"\nTesting with URL: {test_url}")
     print(f"Prompt: '{test_prompt}'")
 
-    result = edit_image(test_url, test_prompt)
+    result = asyncio.run(edit_image(test_url, test_prompt))
 
     if result["status"] == "success":
         print(f"\nSuccess: {result['message']}")
@@ -1,5 +1,7 @@
 from typing import Optional
 
+__all__ = ["format_lead_for_confirmation"]
+
 def format_lead_for_confirmation(
     first_name: str,
     last_name: str,
@@ -30,19 +32,20 @@ def format_lead_for_confirmation(
     Returns:
         A formatted string confirming the user's details.
     """
-    confirmation_message = "Great, thank you! Please take a moment to review the information below. If everything is correct, I can forward this to a dealership to get you a precise quote.\n\n"
-    confirmation_message += f"**First Name:** {first_name}\n"
-    confirmation_message += f"**Last Name:** {last_name}\n"
-    
     year_str = f"{vehicle_year} " if vehicle_year else ""
-    confirmation_message += f"**Vehicle:** {year_str}{vehicle_model}\n"
-    
-    confirmation_message += f"**Email:** {email}\n"
+
+    lines = [
+        "Great, thank you! Please take a moment to review the information below. If everything is correct, I can forward this to a dealership to get you a precise quote.\n",
+        f"**First Name:** {first_name}",
+        f"**Last Name:** {last_name}",
+        f"**Vehicle:** {year_str}{vehicle_model}",
+        f"**Email:** {email}",
+    ]
     if phone_number:
-        confirmation_message += f"**Phone:** {phone_number}\n"
-    confirmation_message += f"**Contact Preference:** {contact_preference}\n"
-    confirmation_message += f"**Zip Code:** {zip_code}\n"
+        lines.append(f"**Phone:** {phone_number}")
+    lines.append(f"**Contact Preference:** {contact_preference}")
+    lines.append(f"**Zip Code:** {zip_code}")
     if notes:
-        confirmation_message += f"**Notes:** {notes}\n"
-        
-    return confirmation_message
+        lines.append(f"**Notes:** {notes}")
+
+    return "\n".join(lines) + "\n"
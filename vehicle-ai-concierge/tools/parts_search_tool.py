@@ -1,6 +1,16 @@
 import json
 import os
-from typing import Optional, List, Dict, Any
+from functools import lru_cache
+from typing import Optional, List, Dict, Any, FrozenSet, Tuple
+
+# orjson decodes the data files several times faster; fall back to the standard
+# library if it isn't installed.
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+__all__ = ["search_parts"]
 
 # --- Data Loading ---
 
@@ -20,8 +30,8 @@ def _load_parts_data() -> List[Dict[str, Any]]:
         # Construct the final path to the data file (e.g., .../data/parts.json)
         json_path = os.path.join(project_root, 'data', 'parts.json')
         
-        with open(json_path, 'r') as f:
-            return json.load(f).get("parts", [])
+        with open(json_path, 'rb') as f:
+            return json_loads(f.read()).get("parts", [])
     except FileNotFoundError:
         print(f"Error: The file at the constructed path was not found. Please ensure 'data/parts.json' exists.")
         return []
@@ -32,6 +42,61 @@ def _load_parts_data() -> List[Dict[str, Any]]:
 # Load the data once when the module is imported
 PARTS_DATABASE = _load_parts_data()
 
+# --- Search Index ---
+
+def _freeze(index: Dict[Any, set]) -> Dict[Any, FrozenSet[int]]:
+    return {key: frozenset(ids) for key, ids in index.items()}
+
+def _build_token_index(parts: List[Dict[str, Any]]) -> Dict[str, FrozenSet[int]]:
+    """
+    Maps each whitespace-separated token of a part's lowercased name and description
+    to the indices of the parts that contain it.
+    """
+    index: Dict[str, set] = {}
+    for i, part in enumerate(parts):
+        text = (part.get("name", "") + " " + part.get("description", "")).lower()
+        for token in text.split():
+            index.setdefault(token, set()).add(i)
+    return _freeze(index)
+
+def _build_compatibility_indexes(parts: List[Dict[str, Any]]) -> Tuple[Dict, Dict, Dict]:
+    """
+    Maps lowercased model, year, and (lowercased model, year) to the indices of the
+    parts compatible with them.
+    """
+    model_index: Dict[str, set] = {}
+    year_index: Dict[int, set] = {}
+    model_year_index: Dict[Tuple[str, int], set] = {}
+    for i, part in enumerate(parts):
+        for comp in part.get("compatibility", []):
+            model_lower = comp.get("model", "").lower()
+            model_index.setdefault(model_lower, set()).add(i)
+            for year in comp.get("years", []):
+                year_index.setdefault(year, set()).add(i)
+                model_year_index.setdefault((model_lower, year), set()).add(i)
+    return _freeze(model_index), _freeze(year_index), _freeze(model_year_index)
+
+TOKEN_INDEX = _build_token_index(PARTS_DATABASE)
+MODEL_INDEX, YEAR_INDEX, MODEL_YEAR_INDEX = _build_compatibility_indexes(PARTS_DATABASE)
+ALL_PART_IDS = frozenset(range(len(PARTS_DATABASE)))
+NO_PART_IDS: FrozenSet[int] = frozenset()
+
+@lru_cache(maxsize=4096)
+def _parts_matching_word(word: str) -> FrozenSet[int]:
+    """
+    Returns the indices of parts whose name or description contains the word, or its
+    simple singular form (e.g., "brakes" also finds "brake").
+
+    A word without whitespace can only occur inside a single token, so scanning the
+    index's vocabulary gives the same matches as scanning every part's full text.
+    """
+    singular_word = word.rstrip('s') if word.endswith('s') and len(word) > 3 else word
+    matches = set()
+    for token, ids in TOKEN_INDEX.items():
+        if word in token or singular_word in token:
+            matches |= ids
+    return frozenset(matches)
+
 # --- Tool Function ---
 
 def search_parts(
@@ -57,51 +122,26 @@ def search_parts(
     if not PARTS_DATABASE:
         return {"count": 0, "results": [], "message": "Parts database is not loaded."}
 
-    filtered_results = []
-    
-    # Normalize model name once if it exists
+    # 1. Narrow down to the parts compatible with the model and year (if provided)
     lower_model = model.lower() if model else None
-
-    for part in PARTS_DATABASE:
-        # 1. Check if the query matches (if a query is provided)
-        query_match = True # Assume it matches if no query is given
-        if query:
-            lower_query = query.lower()
-            text_to_search = (part.get("name", "") + " " + part.get("description", "")).lower()
-            
-            # Check if all words in the query are present in the text
-            query_words = lower_query.split()
-            all_words_match = True
-            for word in query_words:
-                # Handle simple plurals for better matching (e.g., "brakes" should find "brake")
-                singular_word = word.rstrip('s') if word.endswith('s') and len(word) > 3 else word
-                
-                if word not in text_to_search and singular_word not in text_to_search:
-                    all_words_match = False
-                    break
-            query_match = all_words_match
-
-        if not query_match:
-            continue # Skip to the next part if the query doesn't match
-
-        # 2. Check if the part is compatible with the model and year (if provided)
-        compatibility_match = True # Assume it matches if no model or year is given
-        if lower_model or year:
-            compatibility_match = False # Must now find an explicit match
-            for comp in part.get("compatibility", []):
-                # Check if the model in the compatibility entry matches the requested model
-                model_is_compatible = not lower_model or comp.get("model", "").lower() == lower_model
-                
-                # Check if the year in the compatibility entry matches the requested year
-                year_is_compatible = not year or year in comp.get("years", [])
-
-                if model_is_compatible and year_is_compatible:
-                    compatibility_match = True
-                    break # Found a matching compatibility entry, no need to check others for this part
-        
-        if compatibility_match:
-            filtered_results.append(part)
-            
+    if lower_model and year:
+        candidate_ids = MODEL_YEAR_INDEX.get((lower_model, year), NO_PART_IDS)
+    elif lower_model:
+        candidate_ids = MODEL_INDEX.get(lower_model, NO_PART_IDS)
+    elif year:
+        candidate_ids = YEAR_INDEX.get(year, NO_PART_IDS)
+    else:
+        candidate_ids = ALL_PART_IDS
+
+    # 2. Keep only the parts whose text contains every query word (if a query is provided)
+    if query:
+        for word in query.lower().split():
+            if not candidate_ids:
+                break
+            candidate_ids = candidate_ids & _parts_matching_word(word)
+
+    # Return matches in catalog order
+    filtered_results = [PARTS_DATABASE[i] for i in sorted(candidate_ids)]
     return {"count": len(filtered_results), "results": filtered_results}
 
 
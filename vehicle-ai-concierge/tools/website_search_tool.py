@@ -1,19 +1,53 @@
-import os
-import json
-from typing import Dict, Any, Optional
+import asyncio
+import functools
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Dict, Any, List, Optional, Set, Tuple, TypeVar
 
 from google.api_core.client_options import ClientOptions
-from google.cloud import discoveryengine_v1 as discoveryengine
 from google.api_core import exceptions as api_exceptions
-from dotenv import load_dotenv
 
-# Load environment variables for standalone testing and configuration
-load_dotenv()
+from config import settings
+
+if TYPE_CHECKING:
+    from google.adk.tools import ToolContext
+    from google.cloud import discoveryengine_v1 as discoveryengine
+
+__all__ = ["search", "search_async", "search_many"]
 
 # --- Configuration ---
-PROJECT_ID = os.getenv("VERTEX_AI_PROJECT_ID")
-LOCATION = os.getenv("VERTEX_AI_LOCATION")
-ENGINE_ID = os.getenv("VERTEX_AI_ENGINE_ID")
+PROJECT_ID = settings.vertex_ai_project_id
+LOCATION = settings.vertex_ai_location
+ENGINE_ID = settings.vertex_ai_engine_id
+_CONFIGURED = all([PROJECT_ID, LOCATION, ENGINE_ID])
+_SERVING_CONFIG = (
+    f"projects/{PROJECT_ID}/locations/{LOCATION}/collections/default_collection/engines/{ENGINE_ID}/servingConfigs/default_config"
+    if _CONFIGURED
+    else None
+)
+
+# --- Search Sessions ---
+# With SEARCH_SESSIONS=1, searches from one conversation share a Discovery Engine
+# session so follow-up queries are understood in context. The session name is
+# kept in the ADK session state, so it survives across workers with Redis.
+SEARCH_SESSIONS = settings.search_sessions
+SEARCH_SESSION_STATE_KEY = "website_search_session"
+# Searching with session ID "-" makes the service create a new session
+_NEW_SEARCH_SESSION = (
+    f"projects/{PROJECT_ID}/locations/{LOCATION}/collections/default_collection/engines/{ENGINE_ID}/sessions/-"
+    if _CONFIGURED
+    else None
+)
+
+# --- Result Cache ---
+# Repeated queries are answered from memory instead of another Discovery Engine
+# RPC. Entries expire so summaries don't go stale as the website index updates.
+SEARCH_CACHE_SIZE = 512
+SEARCH_CACHE_TTL_SECONDS = 300
+# normalized query -> (expires_at, parsed results)
+_search_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_search_cache_lock = threading.Lock()
 
 # --- Client Initialization ---
 # Configure client options based on location
@@ -22,18 +56,81 @@ client_options = (
     if LOCATION and LOCATION != "global"
     else None
 )
-# Initialize the search client once to be reused
-search_client = discoveryengine.SearchServiceClient(client_options=client_options)
 
+# gRPC channel options: no message size caps (the library's own defaults), and
+# keepalive pings so idle pooled connections are not silently dropped by
+# load balancers between searches.
+_GRPC_CHANNEL_OPTIONS = [
+    ("grpc.max_send_message_length", -1),
+    ("grpc.max_receive_message_length", -1),
+    ("grpc.keepalive_time_ms", 30_000),
+    ("grpc.keepalive_timeout_ms", 10_000),
+]
+_SEARCH_HOST = f"{client_options.api_endpoint if client_options else 'discoveryengine.googleapis.com'}:443"
 
-def _configure_search_request(
-    serving_config: str,
-    search_query: str,
-    session: Optional[str] = None,
-) -> discoveryengine.SearchResponse:
+
+# The Discovery Engine library pulls in gRPC and protobuf, so it is imported and
+# the client created on first search rather than at import. The client and its
+# channel are thread-safe: every search in the process multiplexes over this one
+# HTTP/2 channel, so never create a client per request.
+@functools.lru_cache(maxsize=None)
+def _get_search_client() -> "discoveryengine.SearchServiceClient":
+    from google.cloud import discoveryengine_v1 as discoveryengine
+    from google.cloud.discoveryengine_v1.services.search_service.transports import SearchServiceGrpcTransport
+
+    channel = SearchServiceGrpcTransport.create_channel(_SEARCH_HOST, options=_GRPC_CHANNEL_OPTIONS)
+    return discoveryengine.SearchServiceClient(transport=SearchServiceGrpcTransport(channel=channel))
+
+
+_T = TypeVar("_T")
+
+
+def _for_running_loop(registry: Dict[asyncio.AbstractEventLoop, _T], factory: Callable[[], _T]) -> _T:
+    """Returns the running loop's entry in registry, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    value = registry.get(loop)
+    if value is None:
+        # Forget objects bound to loops that have since been closed
+        for closed_loop in [l for l in list(registry) if l.is_closed()]:
+            registry.pop(closed_loop, None)
+        value = registry[loop] = factory()
+    return value
+
+
+def _create_async_search_client() -> "discoveryengine.SearchServiceAsyncClient":
+    from google.cloud import discoveryengine_v1 as discoveryengine
+    from google.cloud.discoveryengine_v1.services.search_service.transports import (
+        SearchServiceGrpcAsyncIOTransport,
+    )
+
+    channel = SearchServiceGrpcAsyncIOTransport.create_channel(_SEARCH_HOST, options=_GRPC_CHANNEL_OPTIONS)
+    return discoveryengine.SearchServiceAsyncClient(transport=SearchServiceGrpcAsyncIOTransport(channel=channel))
+
+
+# A grpc.aio channel is bound to the event loop that created it, so each loop
+# gets its own async client; in the app that is the single background loop that
+# runs every agent.
+_async_search_clients: Dict[asyncio.AbstractEventLoop, "discoveryengine.SearchServiceAsyncClient"] = {}
+
+
+def _get_async_search_client() -> "discoveryengine.SearchServiceAsyncClient":
+    return _for_running_loop(_async_search_clients, _create_async_search_client)
+
+
+def __getattr__(name: str):
+    # Keep `website_search_tool.search_client` working for callers
+    if name == "search_client":
+        return _get_search_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@functools.lru_cache(maxsize=None)
+def _base_search_request() -> "discoveryengine.SearchRequest":
     """
-    Builds and executes a detailed search request to the Discovery Engine API.
+    Builds the parts of the search request that are the same for every query, once.
     """
+    from google.cloud import discoveryengine_v1 as discoveryengine
+
     content_search_spec = discoveryengine.SearchRequest.ContentSearchSpec(
         snippet_spec=discoveryengine.SearchRequest.ContentSearchSpec.SnippetSpec(
             return_snippet=True
@@ -81,10 +178,7 @@ def _configure_search_request(
     # https://cloud.google.com/python/docs/reference/discoveryengine/latest/google.cloud.discoveryengine_v1.types.SearchRequest.RelevanceThreshold
     relevance_threshold = discoveryengine.SearchRequest.RelevanceThreshold.MEDIUM
 
-    request = discoveryengine.SearchRequest(
-        serving_config=serving_config,
-        session=session,
-        query=search_query,
+    return discoveryengine.SearchRequest(
         page_size=10,
         content_search_spec=content_search_spec,
         query_expansion_spec=query_expansion_spec,
@@ -94,40 +188,183 @@ def _configure_search_request(
         params={"search_type": 1}, # Enable image search
     )
 
-    return search_client.search(request)
+
+def _build_search_request(
+    serving_config: str,
+    search_query: str,
+    session: Optional[str] = None,
+) -> "discoveryengine.SearchRequest":
+    """
+    Builds a detailed search request for the Discovery Engine API.
+    """
+    from google.cloud import discoveryengine_v1 as discoveryengine
+
+    # Copy the prebuilt specs at the protobuf level instead of reconstructing them
+    request = discoveryengine.SearchRequest()
+    discoveryengine.SearchRequest.pb(request).CopyFrom(
+        discoveryengine.SearchRequest.pb(_base_search_request())
+    )
+    request.serving_config = serving_config
+    request.query = search_query
+    if session:
+        request.session = session
+    return request
+
+
+def _configure_search_request(
+    serving_config: str,
+    search_query: str,
+    session: Optional[str] = None,
+) -> "discoveryengine.SearchResponse":
+    """
+    Builds and executes a detailed search request to the Discovery Engine API.
+    """
+    return _get_search_client().search(
+        _build_search_request(serving_config, search_query, session)
+    )
 
 
 def _parse_search_response(
-    response: discoveryengine.SearchResponse,
+    response: "discoveryengine.SearchResponse",
 ) -> Dict[str, Any]:
     """
     Parses a SearchResponse object into a structured dictionary.
     """
 
+    results = []
+    for result in response.results:
+        # Each derived_struct_data access goes through the protobuf map wrapper,
+        # so look it up once per result
+        data = result.document.derived_struct_data
+        results.append({
+            "title": data.get("title"),
+            "pageUrl": data.get("link"),
+            "imageUrl": (data.get("image") or {}).get("link"),
+            # Tuples: read-only, smaller than lists, and shared by cache copies
+            "snippets": tuple(
+                snippet for snippet in (s.get("snippet") for s in data.get("snippets", ()))
+                if snippet
+            ),
+            "extractive_answers": tuple(
+                content for content in (a.get("content") for a in data.get("extractive_answers", ()))
+                if content
+            ),
+        })
+
     out = {
         "summary": response.summary.summary_text if response.summary else None,
-        "results": [
-            {
-                "title": result.document.derived_struct_data.get("title"),
-                "pageUrl": result.document.derived_struct_data.get("link"),
-                "imageUrl": result.document.derived_struct_data.get("image", {}).get("link"),
-                "snippets": [
-                    s.get("snippet")
-                    for s in result.document.derived_struct_data.get("snippets", [])
-                ],
-                "extractive_answers": [
-                    a.get("content")
-                    for a in result.document.derived_struct_data.get("extractive_answers", [])
-                ],
-            }
-            for result in response.results
-        ],
+        "results": results,
     }
 
     return out
 
 
-def search(query: str) -> Dict[str, Any]:
+def _normalize_query(query: Optional[str]) -> str:
+    """Lowercases the query and collapses whitespace; a missing query becomes ""."""
+    return " ".join((query or "").lower().split())
+
+
+def _copy_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Copies a parsed search result. Its shape is fixed (a summary string and a
+    list of flat result dicts holding strings and tuples of strings), so only
+    the list and the dicts need copying; this is much cheaper than
+    copy.deepcopy's generic traversal.
+    """
+    return {
+        "summary": result["summary"],
+        "results": [dict(item) for item in result["results"]],
+    }
+
+
+def _get_cached(key: str) -> Optional[Dict[str, Any]]:
+    with _search_cache_lock:
+        entry = _search_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            del _search_cache[key]
+            return None
+        _search_cache.move_to_end(key)
+    # Callers get their own copy, so the cached value can't be mutated
+    return _copy_result(result)
+
+
+def _store_cached(key: str, result: Dict[str, Any]) -> None:
+    with _search_cache_lock:
+        _search_cache[key] = (time.monotonic() + SEARCH_CACHE_TTL_SECONDS, _copy_result(result))
+        _search_cache.move_to_end(key)
+        while len(_search_cache) > SEARCH_CACHE_SIZE:
+            _search_cache.popitem(last=False)
+
+
+def _not_configured_result() -> Dict[str, Any]:
+    return {
+        "summary": "Search is not configured. Missing PROJECT_ID, LOCATION, or ENGINE_ID.",
+        "results": [],
+    }
+
+
+def _empty_query_result() -> Dict[str, Any]:
+    return {"summary": None, "results": []}
+
+
+def _error_result(e: Exception) -> Dict[str, Any]:
+    """Logs a failed search and returns the message shown to the user."""
+    if isinstance(e, api_exceptions.ServiceUnavailable):
+        print(f"ERROR: Could not connect to the search service. Details: {e}")
+        return {
+            "summary": "I am currently unable to connect to the website search service. Please check your network connection and try again later.",
+            "results": [],
+        }
+    print(f"An unexpected error occurred during search: {e}")
+    return {
+        "summary": "An unexpected error occurred while searching the website.",
+        "results": [],
+    }
+
+
+def _search_session(tool_context: "ToolContext") -> str:
+    """Returns the conversation's Discovery Engine session, or the name that starts a new one."""
+    return tool_context.state.get(SEARCH_SESSION_STATE_KEY) or _NEW_SEARCH_SESSION
+
+
+def _remember_search_session(
+    tool_context: "ToolContext", response: "discoveryengine.SearchResponse"
+) -> None:
+    if response.session_info and response.session_info.name:
+        tool_context.state[SEARCH_SESSION_STATE_KEY] = response.session_info.name
+
+
+def _search_in_session(query: str, tool_context: "ToolContext") -> Dict[str, Any]:
+    """Runs a search in the conversation's Discovery Engine session, starting one if needed."""
+    try:
+        response = _configure_search_request(
+            serving_config=_SERVING_CONFIG,
+            search_query=query,
+            session=_search_session(tool_context),
+        )
+        _remember_search_session(tool_context, response)
+        # Not cached: the answer depends on the conversation so far
+        return _parse_search_response(response)
+    except Exception as e:
+        return _error_result(e)
+
+
+async def _search_in_session_async(query: str, tool_context: "ToolContext") -> Dict[str, Any]:
+    """Async version of _search_in_session. Session searches are not batched."""
+    try:
+        response = await _get_async_search_client().search(
+            _build_search_request(_SERVING_CONFIG, query, _search_session(tool_context))
+        )
+        _remember_search_session(tool_context, response)
+        return _parse_search_response(response)
+    except Exception as e:
+        return _error_result(e)
+
+
+def search(query: str, tool_context: Optional["ToolContext"] = None) -> Dict[str, Any]:
     """
     Performs a search on the website datastore using advanced configurations.
 
@@ -137,31 +374,166 @@ def search(query: str) -> Dict[str, Any]:
     Returns:
         A dictionary containing the structured search results.
     """
-    if not all([PROJECT_ID, LOCATION, ENGINE_ID]):
-        return {
-            "summary": "Search is not configured. Missing PROJECT_ID, LOCATION, or ENGINE_ID.",
-            "results": [],
-        }
-    serving_config = f"projects/{PROJECT_ID}/locations/{LOCATION}/collections/default_collection/engines/{ENGINE_ID}/servingConfigs/default_config"
+    # Blank queries (e.g. from UI focus events) have nothing to search for
+    cache_key = _normalize_query(query)
+    if not cache_key:
+        return _empty_query_result()
+
+    if not _CONFIGURED:
+        return _not_configured_result()
+
+    # ADK supplies tool_context (hidden from the model) when the agent calls this tool
+    if SEARCH_SESSIONS and tool_context is not None:
+        return _search_in_session(query, tool_context)
+
+    cached_result = _get_cached(cache_key)
+    if cached_result is not None:
+        return cached_result
 
     try:
         response = _configure_search_request(
-            serving_config=serving_config, search_query=query
+            serving_config=_SERVING_CONFIG, search_query=query
         )
-        return _parse_search_response(response)
-
-    except api_exceptions.ServiceUnavailable as e:
-        print(f"ERROR: Could not connect to the search service. Details: {e}")
-        return {
-            "summary": "I am currently unable to connect to the website search service. Please check your network connection and try again later.",
-            "results": [],
-        }
+        result = _parse_search_response(response)
+        # Only successful searches are cached; errors below are retried next time
+        _store_cached(cache_key, result)
+        return result
     except Exception as e:
-        print(f"An unexpected error occurred during search: {e}")
-        return {
-            "summary": "An unexpected error occurred while searching the website.",
-            "results": [],
-        }
+        return _error_result(e)
+
+
+async def search_many(queries: List[str]) -> List[Dict[str, Any]]:
+    """
+    Runs several searches concurrently on the async Discovery Engine client, so
+    they take about as long as the slowest one instead of the sum of all of them.
+
+    Args:
+        queries: The search queries.
+
+    Returns:
+        A list with one result per query, in order, each shaped like search()'s result.
+    """
+    if not _CONFIGURED:
+        return [_not_configured_result() for _ in queries]
+
+    async def _search_one(query: str) -> Dict[str, Any]:
+        cache_key = _normalize_query(query)
+        if not cache_key:
+            return _empty_query_result()
+        cached_result = _get_cached(cache_key)
+        if cached_result is not None:
+            return cached_result
+        try:
+            response = await _get_async_search_client().search(
+                _build_search_request(_SERVING_CONFIG, query)
+            )
+            result = _parse_search_response(response)
+            _store_cached(cache_key, result)
+            return result
+        except Exception as e:
+            return _error_result(e)
+
+    # Identical queries (after normalization) share one RPC; each caller still
+    # gets its own copy of the result
+    positions: Dict[str, List[int]] = {}
+    for i, query in enumerate(queries):
+        positions.setdefault(_normalize_query(query), []).append(i)
+
+    unique_results = await asyncio.gather(
+        *(_search_one(queries[indices[0]]) for indices in positions.values())
+    )
+    results: List[Optional[Dict[str, Any]]] = [None] * len(queries)
+    for indices, result in zip(positions.values(), unique_results):
+        results[indices[0]] = result
+        for i in indices[1:]:
+            results[i] = _copy_result(result)
+    return results
+
+
+# --- Micro-batching ---
+# Concurrent search_async() callers are coalesced: queries arriving within
+# MAX_WAIT_MS of the first one (up to MAX_BATCH) are dispatched together as one
+# search_many() fan-out on the shared async client.
+MAX_BATCH = 16
+MAX_WAIT_MS = 20
+
+
+class _BatchScheduler:
+    """Collects queries from concurrent callers and runs them in batches."""
+
+    def __init__(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue: "asyncio.Queue[Tuple[str, asyncio.Future]]" = asyncio.Queue()
+        # normalized query -> future of the queued or running search for it
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._worker = self._loop.create_task(self._run())
+        # The loop only holds weak references to tasks, so running dispatches are
+        # kept here until they finish
+        self._dispatches: Set[asyncio.Task] = set()
+
+    async def submit(self, query: str) -> Dict[str, Any]:
+        key = _normalize_query(query)
+        future = self._in_flight.get(key)
+        if future is None:
+            future = self._loop.create_future()
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+            await self._queue.put((query, future))
+        # Shielded so one caller giving up doesn't cancel the search for the
+        # others waiting on it
+        return _copy_result(await asyncio.shield(future))
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + MAX_WAIT_MS / 1000
+            while len(batch) < MAX_BATCH:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Dispatch without waiting, so the next batch can start collecting
+            dispatch = self._loop.create_task(self._dispatch(batch))
+            self._dispatches.add(dispatch)
+            dispatch.add_done_callback(self._dispatches.discard)
+
+    @staticmethod
+    async def _dispatch(batch: List[Tuple[str, asyncio.Future]]) -> None:
+        try:
+            results = await search_many([query for query, _ in batch])
+        except Exception as e:
+            results = [_error_result(e)] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+# Like the async client, each event loop gets its own scheduler
+_schedulers: Dict[asyncio.AbstractEventLoop, _BatchScheduler] = {}
+
+
+async def search_async(query: str, tool_context: Optional["ToolContext"] = None) -> Dict[str, Any]:
+    """
+    Performs a website search without blocking the event loop, batching it with
+    other searches issued at the same time.
+
+    Args:
+        query: The user's search query.
+
+    Returns:
+        A dictionary containing the structured search results.
+    """
+    if not _normalize_query(query):
+        return _empty_query_result()
+
+    # ADK supplies tool_context (hidden from the model) when the agent calls this tool
+    if SEARCH_SESSIONS and tool_context is not None and _CONFIGURED:
+        return await _search_in_session_async(query, tool_context)
+
+    return await _for_running_loop(_schedulers, _BatchScheduler).submit(query)
 
 
 if __name__ == "__main__":